@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 import filecmp
+import os
 from pathlib import Path
-from typing import TYPE_CHECKING, Literal, NamedTuple
+from typing import TYPE_CHECKING, Callable, Literal, NamedTuple, Union
 
+from organize.filesystem import active_filesystem, moved, removed
 from organize.output import Output
 from organize.resource import Resource
 from organize.template import render
@@ -26,6 +28,10 @@ def next_free_name(dst: Path, template: Template) -> Path:
     """
     Increments {counter} in the template until the given resource does not exist.
 
+    Within a run the names of the destination folder are indexed (see
+    `organize.filesystem`) and the search continues at the last counter handed out
+    for the same name, so finding a free name does not take longer for every file.
+
     Attributes:
         dst (Path):
             The destination path.
@@ -38,9 +44,13 @@ def next_free_name(dst: Path, template: Template) -> Path:
     Returns:
         (Path) A path according to the given template that does not exist.
     """
-    if not dst.exists():
+    fs = active_filesystem()
+    exists = fs.occupied if fs is not None else os.path.lexists
+    if not exists(dst):
         return dst
     counter = 2
+    if fs is not None:
+        counter = fs.counter(dst.parent, template, dst.stem, dst.suffix)
     prev_candidate = None
     while True:
         args = dict(
@@ -50,7 +60,11 @@ def next_free_name(dst: Path, template: Template) -> Path:
         )
         new_name = render(template, args)
         candidate = dst.with_name(new_name)
-        if not candidate.exists():
+        if fs is not None:
+            fs.add_candidate(dst.parent, template, dst.stem, dst.suffix, candidate.name)
+        if not exists(candidate):
+            if fs is not None:
+                fs.set_counter(dst.parent, template, dst.stem, dst.suffix, counter)
             return candidate
         if prev_candidate == candidate:
             raise ValueError(
@@ -74,8 +88,15 @@ def resolve_conflict(
     """
     assert res.path is not None
 
+    # in simulation the filesystem view knows the simulated changes
+    fs = active_filesystem()
+    exists: Callable[[Union[str, Path]], bool] = os.path.exists
+    real_path: Callable[[Union[str, Path]], str] = str
+    if fs is not None:
+        exists, real_path = fs.exists, fs.real_path
+
     # no conflict, just continue with the action.
-    if not dst.exists():
+    if not exists(dst):
         return ConflictResult(skip_action=False, use_dst=dst)
 
     def _print(msg: str):
@@ -93,6 +114,7 @@ def resolve_conflict(
             from organize.actions.trash import trash
 
             trash(path=dst)
+        removed(dst)
         return ConflictResult(skip_action=False, use_dst=dst)
 
     elif conflict_mode == "skip":
@@ -105,10 +127,11 @@ def resolve_conflict(
             from organize.actions.delete import delete
 
             delete(path=dst)
+        removed(dst)
         return ConflictResult(skip_action=False, use_dst=dst)
 
     elif conflict_mode == "deduplicate":
-        if filecmp.cmp(res.path, dst, shallow=True):
+        if filecmp.cmp(real_path(res.path), real_path(dst), shallow=True):
             _print("Duplicate skipped.")
             return ConflictResult(skip_action=True, use_dst=res.path)
         else:
@@ -133,6 +156,7 @@ def resolve_conflict(
         _print('Renaming existing to: "{new_path.name}"')
         if not simulate:
             dst.rename(new_path)
+        moved(dst, new_path)
         return ConflictResult(skip_action=False, use_dst=dst)
 
     raise ValueError("Unknown conflict_mode %s" % conflict_mode)
@@ -1,5 +1,7 @@
 from pathlib import Path
 
+from organize.filesystem import FileSystemView, active_filesystem
+
 
 def user_wants_a_folder(path: str, autodetect: bool) -> bool:
     """
@@ -20,21 +22,21 @@ def prepare_target_path(
     autodetect_folder: bool,
     simulate: bool,
 ) -> Path:
-    result = Path(dst).resolve()
+    # within a run the resolved pathes and created folders are cached
+    fs = active_filesystem() or FileSystemView(simulate=simulate)
+    result = fs.resolve(dst)
     wants_folder = user_wants_a_folder(path=dst, autodetect=autodetect_folder)
 
     # if dst is an existing folder, we use it
-    if result.exists():
-        if result.is_dir():
-            return result / src_name
-        elif wants_folder:
-            raise ValueError(f'Expected "{dst}" to be a folder, but it\'s not!')
+    kind = fs.kind(result)
+    if kind == "dir":
+        return result / src_name
+    elif kind is not None and wants_folder:
+        raise ValueError(f'Expected "{dst}" to be a folder, but it\'s not!')
 
     if wants_folder:
-        if not simulate:
-            result.mkdir(parents=True, exist_ok=True)
+        fs.makedirs(result)
         return result / src_name
     else:
-        if not simulate:
-            result.parent.mkdir(parents=True, exist_ok=True)
+        fs.makedirs(result.parent)
         return result
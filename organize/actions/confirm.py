@@ -6,7 +6,7 @@ from pydantic.dataclasses import dataclass
 from organize.action import ActionConfig
 from organize.output import Output
 from organize.resource import Resource
-from organize.template import Template, render
+from organize.template import compile_template, render
 
 
 @dataclass(config=ConfigDict(coerce_numbers_to_str=True, extra="forbid"))
@@ -24,7 +24,7 @@ class Confirm:
     )
 
     def __post_init__(self):
-        self._msg = Template.from_string(self.msg)
+        self._msg = compile_template(self.msg)
 
     def pipeline(self, res: Resource, output: Output, simulate: bool):
         msg = render(self._msg, res.dict())
@@ -5,9 +5,10 @@ from pydantic.config import ConfigDict
 from pydantic.dataclasses import dataclass
 
 from organize.action import ActionConfig
+from organize.filesystem import created
 from organize.output import Output
 from organize.resource import Resource
-from organize.template import Template, render
+from organize.template import compile_template, render
 
 from .common.conflict import ConflictMode, resolve_conflict
 from .common.target_path import prepare_target_path
@@ -63,8 +64,8 @@ class Copy:
     )
 
     def __post_init__(self):
-        self._dest = Template.from_string(self.dest)
-        self._rename_template = Template.from_string(self.rename_template)
+        self._dest = compile_template(self.dest)
+        self._rename_template = compile_template(self.rename_template)
 
     def pipeline(self, res: Resource, output: Output, simulate: bool):
         assert res.path is not None, "Does not support standalone mode"
@@ -99,6 +100,7 @@ class Copy:
                 shutil.copytree(src=res.path, dst=dst)
             else:
                 shutil.copy2(src=res.path, dst=dst)
+        created(dst, origin=res.path)
 
         # continue with either the original path or the path to the copy
         if self.continue_with == "copy":
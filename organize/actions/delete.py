@@ -7,6 +7,7 @@ from pydantic.config import ConfigDict
 from pydantic.dataclasses import dataclass
 
 from organize.action import ActionConfig
+from organize.filesystem import removed
 
 if TYPE_CHECKING:
     from pathlib import Path
@@ -43,4 +44,5 @@ class Delete:
         output.msg(res=res, msg=f"Deleting {res.path}", sender=self)
         if not simulate:
             delete(res.path)
+        removed(res.path)
         res.path = None
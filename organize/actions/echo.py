@@ -6,7 +6,7 @@ from pydantic.dataclasses import dataclass
 from organize.action import ActionConfig
 from organize.output import Output
 from organize.resource import Resource
-from organize.template import Template, render
+from organize.template import compile_template, render
 
 
 @dataclass(config=ConfigDict(extra="forbid"))
@@ -30,7 +30,7 @@ class Echo:
     )
 
     def __post_init__(self):
-        self._msg_templ = Template.from_string(self.msg)
+        self._msg_templ = compile_template(self.msg)
 
     def pipeline(self, res: Resource, output: Output, simulate: bool):
         full_msg = render(self._msg_templ, res.dict())
@@ -6,9 +6,10 @@ from pydantic.config import ConfigDict
 from pydantic.dataclasses import dataclass
 
 from organize.action import ActionConfig
+from organize.filesystem import created
 from organize.output import Output
 from organize.resource import Resource
-from organize.template import Template, render
+from organize.template import compile_template, render
 
 from .common.conflict import ConflictMode, resolve_conflict
 from .common.target_path import prepare_target_path
@@ -58,8 +59,8 @@ class Hardlink:
     )
 
     def __post_init__(self):
-        self._dest = Template.from_string(self.dest)
-        self._rename_template = Template.from_string(self.rename_template)
+        self._dest = compile_template(self.dest)
+        self._rename_template = compile_template(self.rename_template)
 
     def pipeline(self, res: Resource, output: Output, simulate: bool):
         assert res.path is not None, "Does not support standalone mode"
@@ -85,4 +86,5 @@ class Hardlink:
         output.msg(res=res, msg=f"Creating hardlink at {dst}", sender=self)
         if not simulate:
             create_hardlink(target=res.path, link=dst)
+        created(dst, origin=res.path)
         res.walker_skip_pathes.add(dst)
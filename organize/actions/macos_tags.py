@@ -8,7 +8,7 @@ from pydantic.dataclasses import dataclass
 from organize.action import ActionConfig
 from organize.output import Output
 from organize.resource import Resource
-from organize.template import Template, render
+from organize.template import compile_template, render
 from organize.validators import FlatList
 
 
@@ -39,7 +39,7 @@ class MacOSTags:
     )
 
     def __post_init__(self):
-        self._tags = [Template.from_string(tag) for tag in self.tags]
+        self._tags = [compile_template(tag) for tag in self.tags]
         if sys.platform != "darwin":
             raise EnvironmentError("The macos_tags action is only available on macOS")
 
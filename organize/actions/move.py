@@ -5,9 +5,10 @@ from pydantic.config import ConfigDict
 from pydantic.dataclasses import dataclass
 
 from organize.action import ActionConfig
+from organize.filesystem import moved
 from organize.output import Output
 from organize.resource import Resource
-from organize.template import Template, render
+from organize.template import compile_template, render
 
 from .common.conflict import ConflictMode, resolve_conflict
 from .common.target_path import prepare_target_path
@@ -61,8 +62,8 @@ class Move:
     )
 
     def __post_init__(self):
-        self._dest = Template.from_string(self.dest)
-        self._rename_template = Template.from_string(self.rename_template)
+        self._dest = compile_template(self.dest)
+        self._rename_template = compile_template(self.rename_template)
 
     def pipeline(self, res: Resource, output: Output, simulate: bool):
         assert res.path is not None, "Does not support standalone mode"
@@ -94,6 +95,7 @@ class Move:
         res.walker_skip_pathes.add(dst)
         if not simulate:
             shutil.move(src=res.path, dst=dst)
+        moved(res.path, dst)
 
         # continue with the new path
         res.path = dst
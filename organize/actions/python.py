@@ -1,12 +1,14 @@
 import textwrap
-from typing import ClassVar, Dict, Optional
+from typing import ClassVar
 
+from pydantic import field_validator
 from pydantic.config import ConfigDict
 from pydantic.dataclasses import dataclass
 
 from organize.action import ActionConfig
 from organize.output import Output
 from organize.resource import Resource
+from organize.utils import UserCode, compile_usercode
 
 
 @dataclass(config=ConfigDict(coerce_numbers_to_str=True, extra="forbid"))
@@ -32,11 +34,15 @@ class Python:
         dirs=True,
     )
 
+    @field_validator("code", mode="after")
+    @classmethod
+    def must_compile(cls, value):
+        compile_usercode(textwrap.dedent(value))
+        return value
+
     def __post_init__(self):
         self.code = textwrap.dedent(self.code)
-
-    def __usercode__(self, print, **kwargs) -> Optional[Dict]:
-        raise NotImplementedError()
+        self._usercode = UserCode(self.code)
 
     def pipeline(self, res: Resource, output: Output, simulate: bool):
         if simulate and not self.run_in_simulation:
@@ -55,13 +61,7 @@ class Python:
             msg = f"{sep.join(str(x) for x in values)}{end}"
             output.msg(res=res, msg=msg, sender=self)
 
-        # codegen the user function with arguments as available in the resource
-        kwargs = ", ".join(res.dict().keys())
-        func = f"def __userfunc(print, {kwargs}):\n"
-        func += textwrap.indent(self.code, "    ")
-        func += "\n\nself.__usercode__ = __userfunc"
-        exec(func, globals().copy(), locals().copy())
-        result = self.__usercode__(print=_output_msg, **res.dict())
+        result = self._usercode(print=_output_msg, kwargs=res.dict())
 
         # deep merge the resulting dict
         if not (result is None or isinstance(result, dict)):
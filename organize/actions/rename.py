@@ -6,9 +6,10 @@ from pydantic.config import ConfigDict
 from pydantic.dataclasses import dataclass
 
 from organize.action import ActionConfig
+from organize.filesystem import moved
 from organize.output import Output
 from organize.resource import Resource
-from organize.template import Template, render
+from organize.template import compile_template, render
 
 from .common.conflict import ConflictMode, resolve_conflict
 
@@ -46,8 +47,8 @@ class Rename:
     )
 
     def __post_init__(self):
-        self._new_name = Template.from_string(self.new_name)
-        self._rename_template = Template.from_string(self.rename_template)
+        self._new_name = compile_template(self.new_name)
+        self._rename_template = compile_template(self.rename_template)
 
     def pipeline(self, res: Resource, output: Output, simulate: bool):
         assert res.path is not None, "Does not support standalone mode"
@@ -73,5 +74,6 @@ class Rename:
         output.msg(res=res, msg=f"Renaming to {new_name}", sender=self)
         if not simulate:
             res.path.rename(dst)
+        moved(res.path, dst)
         res.path = dst
         res.walker_skip_pathes.add(dst)
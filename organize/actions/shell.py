@@ -7,7 +7,7 @@ from pydantic.dataclasses import dataclass
 from organize.action import ActionConfig
 from organize.output import Output
 from organize.resource import Resource
-from organize.template import Template, render
+from organize.template import compile_template, render
 
 # TODO: Terminal waterfall: https://github.com/Textualize/rich/discussions/2985
 
@@ -48,8 +48,8 @@ class Shell:
     )
 
     def __post_init__(self):
-        self._cmd = Template.from_string(self.cmd)
-        self._simulation_output = Template.from_string(self.simulation_output)
+        self._cmd = compile_template(self.cmd)
+        self._simulation_output = compile_template(self.simulation_output)
 
     def pipeline(self, res: Resource, output: Output, simulate: bool):
         full_cmd = render(self._cmd, res.dict())
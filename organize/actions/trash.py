@@ -5,6 +5,7 @@ from pydantic.config import ConfigDict
 from pydantic.dataclasses import dataclass
 
 from organize.action import ActionConfig
+from organize.filesystem import removed
 from organize.output import Output
 from organize.resource import Resource
 
@@ -31,3 +32,4 @@ class Trash:
         output.msg(res=res, msg=f'Trash "{res.path}"', sender=self)
         if not simulate:
             trash(res.path)
+        removed(res.path)
@@ -7,7 +7,7 @@ from pydantic.config import ConfigDict
 from pydantic.dataclasses import dataclass
 
 from organize.action import ActionConfig
-from organize.template import Template, render
+from organize.template import compile_template, render
 
 if TYPE_CHECKING:
     from organize.output import Output
@@ -62,8 +62,8 @@ class Write:
     )
 
     def __post_init__(self):
-        self._text = Template.from_string(self.text)
-        self._path = Template.from_string(self.outfile)
+        self._text = compile_template(self.text)
+        self._path = compile_template(self.outfile)
         self._known_files = set()
 
     def pipeline(self, res: Resource, output: Output, simulate: bool):
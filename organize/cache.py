@@ -0,0 +1,744 @@
+"""
+Persistent caches shared by filters across runs.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+import platformdirs
+from pydantic import ConfigDict
+from pydantic.dataclasses import dataclass
+
+from organize.logger import logger
+
+CACHE_DIR = platformdirs.user_cache_path(appname="organize")
+
+# pending writes are committed after this many changes or seconds, so other
+# processes using the same database are not locked out for a whole run.
+COMMIT_EVERY = 500
+COMMIT_INTERVAL = 2.0
+
+# how long to wait for a database locked by another process (seconds)
+BUSY_TIMEOUT = 1.0
+
+
+def connect(path: Union[str, Path]) -> sqlite3.Connection:
+    """
+    Opens a database shared with other organize processes.
+
+    The write-ahead log allows reading while another process writes.
+    """
+    if str(path) == ":memory:":
+        return sqlite3.connect(":memory:", check_same_thread=False)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=BUSY_TIMEOUT, check_same_thread=False)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+    except sqlite3.OperationalError as e:
+        # e.g. locked or the filesystem does not support it
+        logger.debug("Cannot enable the write-ahead log of %s: %s", path, e)
+    return conn
+
+
+class SQLiteStore:
+    """
+    The database handling shared by the persistent caches.
+
+    Writes are committed in batches. A database locked by another process is not an
+    error: reads return nothing (a cache miss) and writes are skipped.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path: Union[str, Path, None] = path
+        self._lock = threading.Lock()
+        self._conn = connect(path)
+        self._pending = 0
+        self._last_commit = time.monotonic()
+
+    def _read(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        try:
+            return self._conn.execute(sql, params).fetchall()
+        except sqlite3.OperationalError as e:
+            logger.debug("Cache read of %s failed: %s", self.path, e)
+            return []
+
+    def _write(self, sql: str, params: Tuple = ()) -> None:
+        # the caller holds the lock
+        try:
+            self._conn.execute(sql, params)
+        except sqlite3.OperationalError as e:
+            logger.debug("Cache write to %s skipped: %s", self.path, e)
+            return
+        self._pending += 1
+        if (
+            self._pending >= COMMIT_EVERY
+            or time.monotonic() - self._last_commit >= COMMIT_INTERVAL
+        ):
+            self._commit()
+
+    def _commit(self) -> None:
+        try:
+            self._conn.commit()
+        except sqlite3.OperationalError as e:
+            # the changes stay pending and are committed with the next batch
+            logger.debug("Cache commit to %s delayed: %s", self.path, e)
+            return
+        self._pending = 0
+        self._last_commit = time.monotonic()
+
+    def commit(self) -> None:
+        """
+        Commits the pending writes.
+        """
+        with self._lock:
+            self._commit()
+
+    def _close(self) -> None:
+        try:
+            with self._lock:
+                self._conn.commit()
+        except sqlite3.Error as e:
+            logger.exception(e)
+        finally:
+            self._conn.close()
+
+
+@dataclass(config=ConfigDict(extra="forbid"))
+class HashCacheSettings:
+    """
+    Attributes:
+        path (str):
+            Where to store the cache database. Defaults to `hashes.sqlite` in the
+            user cache directory.
+        max_entries (int):
+            The maximum number of cached digests. The least recently used entries
+            are evicted first.
+        max_age_days (float):
+            Entries which were not used for this many days are evicted.
+    """
+
+    path: Optional[str] = None
+    max_entries: int = 1_000_000
+    max_age_days: Optional[float] = 90
+
+
+class HashCache(SQLiteStore):
+    """
+    A SQLite database of file digests.
+
+    Entries are keyed by the file identity (device and inode) and are only valid as
+    long as the file's size and modification time do not change.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        max_entries: int = 1_000_000,
+        max_age_days: Optional[float] = 90,
+    ):
+        super().__init__(path)
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS digests (
+                dev INTEGER NOT NULL,
+                ino INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                algo TEXT NOT NULL,
+                digest TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (dev, ino, kind, algo)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS digests_last_used ON digests (last_used)"
+        )
+
+    @classmethod
+    def from_settings(cls, settings: HashCacheSettings) -> HashCache:
+        path = settings.path or CACHE_DIR / "hashes.sqlite"
+        return cls(
+            path=os.path.expanduser(path),
+            max_entries=settings.max_entries,
+            max_age_days=settings.max_age_days,
+        )
+
+    def digest(
+        self,
+        path: Path,
+        kind: str,
+        algo: str,
+        compute: Callable[[], str],
+    ) -> str:
+        """
+        Returns the cached digest of the given file or computes and stores it.
+
+        Args:
+            kind: The kind of digest, e.g. "full" or "chunk1024".
+            algo: The hash algorithm.
+            compute: Calculates the digest if it is not cached.
+        """
+        stat = path.stat()
+        # some filesystems do not provide inode numbers
+        if not stat.st_ino:
+            return compute()
+
+        key = (stat.st_dev, stat.st_ino, kind, algo)
+        now = time.time()
+        with self._lock:
+            rows = self._read(
+                "SELECT size, mtime_ns, digest FROM digests "
+                "WHERE dev=? AND ino=? AND kind=? AND algo=?",
+                key,
+            )
+            if rows and rows[0][:2] == (stat.st_size, stat.st_mtime_ns):
+                self._write(
+                    "UPDATE digests SET last_used=? "
+                    "WHERE dev=? AND ino=? AND kind=? AND algo=?",
+                    (now, *key),
+                )
+                return rows[0][2]
+
+        result = compute()
+        with self._lock:
+            self._write(
+                "INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (*key[:2], stat.st_size, stat.st_mtime_ns, kind, algo, result, now),
+            )
+        return result
+
+    def evict(self) -> None:
+        """
+        Removes entries exceeding the configured age and size limits.
+        """
+        with self._lock:
+            if self.max_age_days is not None:
+                oldest = time.time() - self.max_age_days * 24 * 60 * 60
+                self._write("DELETE FROM digests WHERE last_used < ?", (oldest,))
+            self._write(
+                "DELETE FROM digests WHERE rowid IN ("
+                "  SELECT rowid FROM digests ORDER BY last_used DESC LIMIT -1 OFFSET ?"
+                ")",
+                (self.max_entries,),
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM digests").fetchone()[0]
+
+    def close(self) -> None:
+        try:
+            self.evict()
+        except sqlite3.Error as e:
+            logger.exception(e)
+        self._close()
+
+
+_hash_cache: Optional[HashCache] = None
+
+
+def active_hash_cache() -> Optional[HashCache]:
+    return _hash_cache
+
+
+@contextmanager
+def use_hash_cache(settings: Optional[HashCacheSettings]) -> Iterator[None]:
+    """
+    Enables the hash cache with the given settings for the duration of a run.
+    """
+    global _hash_cache
+    if settings is None:
+        yield
+        return
+    _hash_cache = HashCache.from_settings(settings)
+    try:
+        yield
+    finally:
+        _hash_cache.close()
+        _hash_cache = None
+
+
+@dataclass(config=ConfigDict(extra="forbid"))
+class TextCacheSettings:
+    """
+    Attributes:
+        path (str):
+            Where to store the cache database. Defaults to `texts.sqlite` in the
+            user cache directory.
+        max_size_mb (float):
+            The maximum size of the (compressed) cached texts in megabytes. The least
+            recently used entries are evicted first.
+    """
+
+    path: Optional[str] = None
+    max_size_mb: float = 512
+
+
+TextKey = Tuple[int, int, str]
+
+
+class TextCache(SQLiteStore):
+    """
+    A cache of texts extracted from files, e.g. by the `filecontent` filter.
+
+    Entries are keyed by the file identity (device and inode) and are only valid as
+    long as the file's size and modification time do not change.
+
+    Recently used texts are kept in memory. If a path is given the texts are also
+    stored compressed in a SQLite database, so later runs can reuse them.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path, None] = None,
+        max_size_mb: float = 512,
+        memory_size_mb: float = 64,
+    ):
+        self.path = path
+        self.max_size_mb = max_size_mb
+        self.memory_size_mb = memory_size_mb
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[TextKey, Tuple[int, int, str]] = OrderedDict()
+        self._memory_size = 0
+        # without a path the texts are only kept in memory
+        self._persistent = path is not None
+        if path is None:
+            return
+        super().__init__(path)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS texts (
+                dev INTEGER NOT NULL,
+                ino INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                content BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (dev, ino, kind)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS texts_last_used ON texts (last_used)"
+        )
+
+    @classmethod
+    def from_settings(cls, settings: TextCacheSettings) -> TextCache:
+        path = settings.path or CACHE_DIR / "texts.sqlite"
+        return cls(path=os.path.expanduser(path), max_size_mb=settings.max_size_mb)
+
+    def _remember(self, key: TextKey, size: int, mtime_ns: int, text: str) -> None:
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_size -= len(old[2])
+        self._memory[key] = (size, mtime_ns, text)
+        self._memory_size += len(text)
+        while self._memory_size > self.memory_size_mb * 1_000_000 and self._memory:
+            _, (_, _, evicted) = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+
+    def _lookup(self, key: TextKey, size: int, mtime_ns: int) -> Optional[str]:
+        cached = self._memory.get(key)
+        if cached is not None and cached[:2] == (size, mtime_ns):
+            self._memory.move_to_end(key)
+            return cached[2]
+        if not self._persistent:
+            return None
+        rows = self._read(
+            "SELECT size, mtime_ns, content FROM texts "
+            "WHERE dev=? AND ino=? AND kind=?",
+            key,
+        )
+        if not rows or rows[0][:2] != (size, mtime_ns):
+            return None
+        self._write(
+            "UPDATE texts SET last_used=? WHERE dev=? AND ino=? AND kind=?",
+            (time.time(), *key),
+        )
+        text = zlib.decompress(rows[0][2]).decode("utf-8")
+        self._remember(key, size, mtime_ns, text)
+        return text
+
+    def text(self, path: Path, kind: str, extract: Callable[[], str]) -> str:
+        """
+        Returns the cached text of the given file or extracts and stores it.
+
+        Args:
+            kind: The kind of extraction, e.g. the extractor and its options.
+            extract: Extracts the text if it is not cached.
+        """
+        stat = path.stat()
+        # some filesystems do not provide inode numbers
+        if not stat.st_ino:
+            return extract()
+
+        key = (stat.st_dev, stat.st_ino, kind)
+        with self._lock:
+            text = self._lookup(key, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+        if text is not None:
+            return text
+
+        text = extract()
+        with self._lock:
+            self._remember(key, size=stat.st_size, mtime_ns=stat.st_mtime_ns, text=text)
+            if self._persistent:
+                self._write(
+                    "INSERT OR REPLACE INTO texts VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        *key,
+                        stat.st_size,
+                        stat.st_mtime_ns,
+                        zlib.compress(text.encode("utf-8")),
+                        time.time(),
+                    ),
+                )
+        return text
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used texts exceeding the configured size.
+        """
+        if not self._persistent:
+            return
+        with self._lock:
+            self._write(
+                "DELETE FROM texts WHERE rowid IN ("
+                "  SELECT rowid FROM ("
+                "    SELECT rowid, SUM(LENGTH(content)) "
+                "      OVER (ORDER BY last_used DESC, rowid) AS total FROM texts"
+                "  ) WHERE total > ?"
+                ")",
+                (int(self.max_size_mb * 1_000_000),),
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            if not self._persistent:
+                return len(self._memory)
+            return self._conn.execute("SELECT COUNT(*) FROM texts").fetchone()[0]
+
+    def commit(self) -> None:
+        if self._persistent:
+            super().commit()
+
+    def close(self) -> None:
+        self._memory.clear()
+        self._memory_size = 0
+        if not self._persistent:
+            return
+        try:
+            self.evict()
+        except sqlite3.Error as e:
+            logger.exception(e)
+        self._close()
+
+
+_text_cache: Optional[TextCache] = None
+
+
+def active_text_cache() -> Optional[TextCache]:
+    return _text_cache
+
+
+@contextmanager
+def use_text_cache(settings: Optional[TextCacheSettings]) -> Iterator[None]:
+    """
+    Caches extracted texts for the duration of a run.
+
+    Without settings the texts are only kept in memory.
+    """
+    global _text_cache
+    if settings is None:
+        _text_cache = TextCache()
+    else:
+        _text_cache = TextCache.from_settings(settings)
+    try:
+        yield
+    finally:
+        _text_cache.close()
+        _text_cache = None
+
+
+def commit_caches() -> None:
+    """
+    Commits the pending writes of the active caches, e.g. after a batch of the watch
+    mode.
+    """
+    if _hash_cache is not None:
+        _hash_cache.commit()
+    if _text_cache is not None:
+        _text_cache.commit()
+
+
+class DuplicateIndex(SQLiteStore):
+    """
+    A SQLite database of known files for duplicate detection across runs.
+
+    For every file the size, the hash of the first chunk and the full hash is
+    stored (the hashes only if they were needed). Entries of files which vanished
+    or changed are pruned when they are looked up.
+    """
+
+    def __init__(self, path: Union[str, Path], algo: str):
+        super().__init__(path)
+        self.algo = algo
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT NOT NULL,
+                algo TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                chunk_hash TEXT,
+                full_hash TEXT,
+                PRIMARY KEY (path, algo)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS files_size ON files (algo, size)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS files_full_hash ON files (algo, full_hash)"
+        )
+
+    def add(
+        self,
+        path: Path,
+        size: int,
+        mtime_ns: int,
+        chunk_hash: Optional[str] = None,
+        full_hash: Optional[str] = None,
+    ) -> None:
+        """
+        Adds or updates a file. Known hashes are kept if the file did not change.
+        """
+        with self._lock:
+            self._write(
+                """
+                INSERT INTO files VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (path, algo) DO UPDATE SET
+                    chunk_hash = CASE
+                        WHEN size = excluded.size AND mtime_ns = excluded.mtime_ns
+                        THEN COALESCE(excluded.chunk_hash, chunk_hash)
+                        ELSE excluded.chunk_hash END,
+                    full_hash = CASE
+                        WHEN size = excluded.size AND mtime_ns = excluded.mtime_ns
+                        THEN COALESCE(excluded.full_hash, full_hash)
+                        ELSE excluded.full_hash END,
+                    size = excluded.size,
+                    mtime_ns = excluded.mtime_ns
+                """,
+                (str(path), self.algo, size, mtime_ns, chunk_hash, full_hash),
+            )
+
+    def remove(self, path: Path) -> None:
+        with self._lock:
+            self._write(
+                "DELETE FROM files WHERE path=? AND algo=?", (str(path), self.algo)
+            )
+
+    def _is_valid(self, path: Path, size: int, mtime_ns: int) -> bool:
+        # prune entries of files which vanished or changed
+        try:
+            stat = path.stat()
+            if (stat.st_size, stat.st_mtime_ns) == (size, mtime_ns):
+                return True
+        except OSError:
+            pass
+        self.remove(path)
+        return False
+
+    def find(
+        self,
+        path: Path,
+        size: int,
+        chunk_hash: Callable[[Path], str],
+        full_hash: Callable[[Path], str],
+    ) -> Optional[Path]:
+        """
+        Returns a known file with the same content as `path` or `None`.
+
+        The hashes are computed only if files of the same size (and first chunk) are
+        known. Missing hashes of known files are computed and stored. Known files are
+        only checked on disk before they are read or returned as a match.
+        """
+        with self._lock:
+            candidates = self._read(
+                "SELECT path, mtime_ns, chunk_hash, full_hash FROM files "
+                "WHERE algo=? AND size=? AND path!=?",
+                (self.algo, size, str(path)),
+            )
+        if not candidates:
+            return None
+
+        chunk = chunk_hash(path)
+        same_chunk = []
+        for known_str, mtime_ns, known_chunk, known_full in candidates:
+            known = Path(known_str)
+            if known_chunk is None:
+                if not self._is_valid(known, size=size, mtime_ns=mtime_ns):
+                    continue
+                known_chunk = chunk_hash(known)
+                self.add(known, size=size, mtime_ns=mtime_ns, chunk_hash=known_chunk)
+            if known_chunk == chunk:
+                same_chunk.append((known, mtime_ns, known_full))
+        if not same_chunk:
+            return None
+
+        full = full_hash(path)
+        for known, mtime_ns, known_full in same_chunk:
+            if known_full is None:
+                if not self._is_valid(known, size=size, mtime_ns=mtime_ns):
+                    continue
+                known_full = full_hash(known)
+                self.add(known, size=size, mtime_ns=mtime_ns, full_hash=known_full)
+            elif known_full == full and not self._is_valid(
+                known, size=size, mtime_ns=mtime_ns
+            ):
+                continue
+            if known_full == full:
+                return known
+        return None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM files WHERE algo=?", (self.algo,)
+            ).fetchone()[0]
+
+    def close(self) -> None:
+        self._close()
+
+
+class JournalView:
+    """
+    The part of the `DirectoryJournal` belonging to a single location of a rule.
+
+    Used by the walker to find directories which did not change since the last run.
+    """
+
+    # Directories modified shortly before they were listed are not recorded, as a
+    # later change might not be detectable with coarse mtime resolutions.
+    RACY_NS = 2_000_000_000
+
+    def __init__(self, scope: str, known: Dict[str, Tuple[int, List[str]]]):
+        self.scope = scope
+        self._known = known
+        self._observed: Dict[str, int] = {}
+        self._pending: Dict[str, Tuple[int, List[str]]] = {}
+        self.seen: Set[str] = set()
+
+    def unchanged_subdirs(self, path: str) -> Optional[List[str]]:
+        """
+        Returns the names of the subdirectories of `path` if the directory did not
+        change since the last run, otherwise `None`.
+        """
+        self.seen.add(path)
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        self._observed[path] = mtime_ns
+        known = self._known.get(path)
+        if known is not None and known[0] == mtime_ns:
+            return known[1]
+        return None
+
+    def record(self, path: str, subdirs: List[str]) -> None:
+        """
+        Records the state of a directory which was listed completely.
+        """
+        mtime_ns = self._observed.get(path)
+        if mtime_ns is not None and time.time_ns() - mtime_ns > self.RACY_NS:
+            self._pending[path] = (mtime_ns, subdirs)
+
+    def stale(self) -> List[str]:
+        """
+        The known directories which were not walked, e.g. because they vanished.
+        """
+        return [path for path in self._known if path not in self.seen]
+
+    def changes(self) -> Dict[str, Tuple[int, List[str]]]:
+        return self._pending
+
+
+class DirectoryJournal:
+    """
+    A SQLite database of the directories walked by incremental locations.
+
+    For every directory the modification time and the names of its subdirectories
+    are stored. As long as the modification time does not change, no entries were
+    added, removed or renamed, so the directory does not need to be listed again.
+
+    The recorded states only become valid when `commit` is called after the rule
+    handled all files successfully.
+    """
+
+    def __init__(self, path: Union[str, Path, None] = None):
+        if path is None:
+            path = CACHE_DIR / "journal.sqlite"
+        self.path = path
+        self._views: List[JournalView] = []
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path))
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS dirs (
+                scope TEXT NOT NULL,
+                path TEXT NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                subdirs TEXT NOT NULL,
+                PRIMARY KEY (scope, path)
+            )
+            """
+        )
+
+    def view(self, scope: str) -> JournalView:
+        rows = self._conn.execute(
+            "SELECT path, mtime_ns, subdirs FROM dirs WHERE scope=?", (scope,)
+        )
+        known = {
+            path: (mtime_ns, json.loads(subdirs)) for path, mtime_ns, subdirs in rows
+        }
+        view = JournalView(scope=scope, known=known)
+        self._views.append(view)
+        return view
+
+    def commit(self) -> None:
+        for view in self._views:
+            self._conn.executemany(
+                "DELETE FROM dirs WHERE scope=? AND path=?",
+                ((view.scope, path) for path in view.stale()),
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?)",
+                (
+                    (view.scope, path, mtime_ns, json.dumps(subdirs))
+                    for path, (mtime_ns, subdirs) in view.changes().items()
+                ),
+            )
+        self._conn.commit()
+        self._views.clear()
+
+    def close(self) -> None:
+        try:
+            self._conn.close()
+        except sqlite3.Error as e:
+            logger.exception(e)
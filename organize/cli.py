@@ -4,6 +4,7 @@ organize - The file management automation tool.
 Usage:
   organize run    [options] [<config> | --stdin]
   organize sim    [options] [<config> | --stdin]
+  organize watch  [options] [--sim] [<config> | --stdin]
   organize new    [<config>]
   organize edit   [<config>]
   organize check  [<config> | --stdin]
@@ -17,6 +18,8 @@ Usage:
 Commands:
   run        Organize your files.
   sim        Simulate organizing your files.
+  watch      Organize changed files as soon as they appear (Linux only).
+               Use --sim to only simulate the changes.
   new        Creates a default config.
   edit       Edit the config file with $EDITOR
   check      Check config file validity
@@ -36,6 +39,10 @@ Options:
                                   The output format [Default: default]
   -T --tags <tags>                Tags to run (eg. "initial,release")
   -S --skip-tags <tags>           Tags to skip
+  -j --jobs <n>                   Number of files to filter in parallel [Default: 1]
+  --hash-cache                    Cache file hashes between runs
+  --delay <seconds>               Seconds without further changes before the rules
+                                  are run in watch mode [Default: 1]
   -h --help                       Show this help page.
 """
 import os
@@ -130,6 +137,8 @@ def execute(
     format: OutputFormat,
     tags: Tags,
     skip_tags: Tags,
+    hash_cache: bool,
+    jobs: int,
     simulate: bool,
 ) -> None:
     Config.from_string(
@@ -141,6 +150,34 @@ def execute(
         tags=tags,
         skip_tags=skip_tags,
         working_dir=working_dir or Path("."),
+        hash_cache=hash_cache,
+        jobs=jobs,
+    )
+
+
+def watch(
+    config: ConfigWithPath,
+    working_dir: Optional[Path],
+    format: OutputFormat,
+    tags: Tags,
+    skip_tags: Tags,
+    hash_cache: bool,
+    jobs: int,
+    delay: float,
+    simulate: bool,
+) -> None:
+    Config.from_string(
+        config=config.config,
+        config_path=config.config_path,
+    ).watch(
+        simulate=simulate,
+        output=_output_for_format(format),
+        tags=tags,
+        skip_tags=skip_tags,
+        working_dir=working_dir or Path("."),
+        hash_cache=hash_cache,
+        jobs=jobs,
+        delay=delay,
     )
 
 
@@ -209,6 +246,7 @@ class CliArgs(BaseModel):
     # commands
     run: bool
     sim: bool
+    watch: bool
     new: bool
     edit: bool
     check: bool
@@ -224,6 +262,12 @@ class CliArgs(BaseModel):
     tags: Optional[str] = Field(..., alias="--tags")
     skip_tags: Optional[str] = Field(..., alias="--skip-tags")
     stdin: bool = Field(..., alias="--stdin")
+    hash_cache: bool = Field(False, alias="--hash-cache")
+    jobs: int = Field(1, alias="--jobs", ge=1)
+
+    # watch options
+    simulate: bool = Field(False, alias="--sim")
+    delay: float = Field(1.0, alias="--delay", gt=0)
 
     # show options
     path: bool = Field(False, alias="--path")
@@ -272,11 +316,25 @@ def cli(argv: Union[list[str], str, None] = None) -> None:
                 format=args.format,
                 tags=_split_tags(args.tags),
                 skip_tags=_split_tags(args.skip_tags),
+                hash_cache=args.hash_cache,
+                jobs=args.jobs,
             )
             if args.run:
                 _execute(simulate=False)
             elif args.sim:
                 _execute(simulate=True)
+        elif args.watch:
+            watch(
+                config=_config_with_path(),
+                working_dir=args.working_dir,
+                format=args.format,
+                tags=_split_tags(args.tags),
+                skip_tags=_split_tags(args.skip_tags),
+                hash_cache=args.hash_cache,
+                jobs=args.jobs,
+                delay=args.delay,
+                simulate=args.simulate,
+            )
         elif args.new:
             new(config=args.config)
         elif args.edit:
@@ -2,18 +2,31 @@ from __future__ import annotations
 
 import os
 import textwrap
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Iterable, List, Optional, Union
+from typing import Dict, Iterable, Iterator, List, Optional, Union
 
 import yaml
-from pydantic import ConfigDict, ValidationError
+from pydantic import ConfigDict, ValidationError, field_validator
 from pydantic.dataclasses import dataclass
 
+from .cache import (
+    HashCacheSettings,
+    TextCacheSettings,
+    commit_caches,
+    use_hash_cache,
+    use_text_cache,
+)
 from .errors import ConfigError
+from .filesystem import use_filesystem
+from .logger import logger
 from .output import Default, Output
 from .rule import Rule
-from .template import render
+from .template import render, render_stats
 from .utils import ReportSummary, normalize_unicode
+from .walker import ScanCache, SkipPathes
+from .watch import Watcher
 
 Tags = Iterable[str]
 
@@ -55,9 +68,31 @@ def should_execute(rule_tags: Tags, tags: Tags, skip_tags: Tags) -> bool:
 @dataclass(config=ConfigDict(extra="ignore"))
 class Config:
     rules: List[Rule]
+    hash_cache: Optional[HashCacheSettings] = None
+    text_cache: Optional[TextCacheSettings] = None
 
     _config_path: Optional[Path] = None
 
+    @field_validator("hash_cache", mode="before")
+    @classmethod
+    def validate_hash_cache(cls, value):
+        # allow `hash_cache: true` to enable the cache with default settings
+        if value is True:
+            return HashCacheSettings()
+        if value is False:
+            return None
+        return value
+
+    @field_validator("text_cache", mode="before")
+    @classmethod
+    def validate_text_cache(cls, value):
+        # allow `text_cache: true` to enable the cache with default settings
+        if value is True:
+            return TextCacheSettings()
+        if value is False:
+            return None
+        return value
+
     @classmethod
     def from_string(cls, config: str, config_path: Optional[Path] = None) -> Config:
         normalized = normalize_unicode(config)
@@ -79,15 +114,23 @@ class Config:
         inst = cls.from_string(text, config_path=config_path)
         return inst
 
-    def execute(
+    @contextmanager
+    def _session(
         self,
-        simulate: bool = True,
-        output: Output = Default(),
-        tags: Tags = set(),
-        skip_tags: Tags = set(),
+        simulate: bool,
+        output: Output,
         working_dir: Union[str, Path] = ".",
-    ) -> None:
+        hash_cache: bool = False,
+    ) -> Iterator[ReportSummary]:
+        """
+        Prepares a run or watch session: changes into the working dir, enables the
+        caches and starts the output. Afterwards the rules are closed and the output
+        ends with the summary the rules were added to.
+        """
         working_path = Path(render(str(working_dir)))
+        hash_cache_settings = self.hash_cache
+        if hash_cache and hash_cache_settings is None:
+            hash_cache_settings = HashCacheSettings()
         os.chdir(working_path)
         output.start(
             simulate=simulate,
@@ -96,17 +139,99 @@ class Config:
         )
         summary = ReportSummary()
         try:
-            for rule_nr, rule in enumerate(self.rules):
-                if should_execute(
-                    rule_tags=rule.tags,
-                    tags=tags,
-                    skip_tags=skip_tags,
-                ):
-                    rule_summary = rule.execute(
-                        simulate=simulate,
-                        output=output,
-                        rule_nr=rule_nr,
-                    )
-                    summary += rule_summary
+            with use_hash_cache(hash_cache_settings), use_text_cache(self.text_cache):
+                yield summary
         finally:
+            for rule in self.rules:
+                rule.close()
             output.end(summary.success, summary.errors)
+            logger.debug("Template rendering: %s", render_stats())
+
+    def execute(
+        self,
+        simulate: bool = True,
+        output: Output = Default(),
+        tags: Tags = set(),
+        skip_tags: Tags = set(),
+        working_dir: Union[str, Path] = ".",
+        hash_cache: bool = False,
+        jobs: int = 1,
+    ) -> None:
+        # rules walking the same locations share their directory listings
+        scan_cache = None
+        if sum(1 for rule in self.rules if rule.enabled and rule.locations) > 1:
+            scan_cache = ScanCache()
+        with self._session(simulate, output, working_dir, hash_cache) as summary:
+            # the actions of all rules share what they know about the filesystem
+            with use_filesystem(simulate=simulate):
+                for rule_nr, rule in enumerate(self.rules):
+                    if should_execute(
+                        rule_tags=rule.tags,
+                        tags=tags,
+                        skip_tags=skip_tags,
+                    ):
+                        summary += rule.execute(
+                            simulate=simulate,
+                            output=output,
+                            rule_nr=rule_nr,
+                            jobs=jobs,
+                            scan_cache=scan_cache,
+                        )
+
+    def watch(
+        self,
+        simulate: bool = True,
+        output: Output = Default(),
+        tags: Tags = set(),
+        skip_tags: Tags = set(),
+        working_dir: Union[str, Path] = ".",
+        hash_cache: bool = False,
+        jobs: int = 1,
+        delay: float = 1.0,
+        stop: Optional[threading.Event] = None,
+    ) -> None:
+        """
+        Watches the locations of the rules and runs the rules on the changed pathes
+        once there were no further changes for `delay` seconds.
+
+        Runs until interrupted or until `stop` is set. Rules without locations are
+        not run.
+        """
+        rules = [
+            (rule_nr, rule)
+            for rule_nr, rule in enumerate(self.rules)
+            if rule.enabled
+            and rule.locations
+            and should_execute(rule_tags=rule.tags, tags=tags, skip_tags=skip_tags)
+        ]
+        # the action targets of each rule in the last run. Their changes are caused
+        # by ourselves, so the rule does not handle them again.
+        targets: Dict[int, SkipPathes] = {}
+        try:
+            with self._session(simulate, output, working_dir, hash_cache) as summary:
+                with Watcher([rule for _, rule in rules]) as watcher:
+                    for changes in watcher.changes(delay=delay, stop=stop):
+                        # other programs change the folders between the batches
+                        with use_filesystem(simulate=simulate):
+                            for rule_nr, rule in rules:
+                                rule_changes = changes
+                                own_targets = targets.pop(rule_nr, None)
+                                if changes is not None and own_targets is not None:
+                                    rule_changes = [
+                                        x for x in changes if x not in own_targets
+                                    ]
+                                targets[rule_nr] = SkipPathes()
+                                summary += rule.execute(
+                                    simulate=simulate,
+                                    output=output,
+                                    rule_nr=rule_nr,
+                                    jobs=jobs,
+                                    changes=rule_changes,
+                                    skip_pathes=targets[rule_nr],
+                                )
+                        # don't keep other processes waiting until we stop watching
+                        commit_caches()
+                        for _, rule in rules:
+                            rule.flush()
+        except KeyboardInterrupt:
+            pass
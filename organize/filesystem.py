@@ -0,0 +1,301 @@
+"""
+What the actions of a run know about the filesystem.
+"""
+
+from __future__ import annotations
+
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from stat import S_ISDIR
+from typing import Any, Dict, Iterator, List, Literal, Optional, Set, Tuple, Union
+
+PathLike = Union[str, Path]
+
+
+def _key(path: PathLike) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+class FileSystemView:
+    """
+    Indexes the names in the destination folders of the actions.
+
+    A folder is listed with a single `scandir` when it is first needed. Afterwards the
+    actions report the pathes they create and remove, so the listing stays up to date
+    without further syscalls. In simulation the listings are the only source of truth,
+    as the simulated changes never reach the disk.
+
+    Resolved destinations are cached as well. In simulation the known folders are
+    cached and the folders which would have been created count as existing. In a
+    real run a folder is checked with a single `stat` each time, as it may have been
+    removed by other programs (or the `shell` and `python` actions).
+
+    In simulation the view is an overlay of the real filesystem: it records the
+    simulated creates, moves and deletes, so `exists` and the conflict handling see
+    the state the filesystem would be in. Created pathes remember the real path with
+    their contents (see `real_path`).
+
+    Attributes:
+        simulate (bool): Whether the actions of the run are simulated.
+    """
+
+    def __init__(self, simulate: bool = False) -> None:
+        self.simulate = simulate
+        self._names: Dict[str, Set[str]] = {}
+        # the last counter handed out by `next_free_name` per folder and template
+        self._counters: Dict[str, Dict[Tuple[Any, str, str], int]] = {}
+        # the names tried by `next_free_name` per folder and the counter they belong to
+        self._candidates: Dict[str, Dict[str, Tuple[Any, str, str]]] = {}
+        self._resolved: Dict[str, Path] = {}
+        # simulation: the existing folders and the folders which would be created
+        self._dirs: Set[str] = set()
+        # the ancestors of the folders above, so removing a file needs no search
+        self._ancestors: Set[str] = set()
+        # simulation: the removed pathes and the real pathes behind the created ones
+        self._removed: Set[str] = set()
+        self._origins: Dict[str, str] = {}
+
+    def _remember_ancestors(self, key: str) -> None:
+        parent = os.path.dirname(key)
+        while parent != key and parent not in self._ancestors:
+            self._ancestors.add(parent)
+            key, parent = parent, os.path.dirname(parent)
+
+    def names(self, folder: PathLike) -> Set[str]:
+        """
+        The (normcased) names in the given folder.
+        """
+        key = _key(folder)
+        names = self._names.get(key)
+        if names is None:
+            names = set()
+            if not self.is_removed(key):
+                try:
+                    with os.scandir(self.real_path(key)) as it:
+                        names.update(os.path.normcase(entry.name) for entry in it)
+                except OSError:
+                    pass
+            self._names[key] = names
+            self._remember_ancestors(key)
+        return names
+
+    def real_path(self, path: PathLike) -> str:
+        """
+        The path on disk holding the contents of `path`.
+
+        In simulation a moved or copied path is backed by its source.
+        """
+        key = _key(path)
+        if not self._origins:
+            return key
+        current = key
+        rest: List[str] = []
+        while True:
+            origin = self._origins.get(current)
+            if origin is not None:
+                return os.path.join(origin, *reversed(rest))
+            parent, name = os.path.split(current)
+            if parent == current:
+                return key
+            rest.append(name)
+            current = parent
+
+    def is_removed(self, path: PathLike) -> bool:
+        """
+        Whether the path or one of its parents was removed in simulation.
+        """
+        if not self._removed:
+            return False
+        key = _key(path)
+        while True:
+            if key in self._removed:
+                return True
+            parent = os.path.dirname(key)
+            if parent == key:
+                return False
+            key = parent
+
+    def exists(self, path: PathLike) -> bool:
+        """
+        Whether the path exists (in simulation: would exist).
+        """
+        if not self.simulate:
+            return os.path.exists(path)
+        key = _key(path)
+        if key in self._dirs:
+            return True
+        if self.is_removed(key):
+            return False
+        folder, name = os.path.split(key)
+        return folder == key or name in self.names(folder)
+
+    def occupied(self, path: PathLike) -> bool:
+        """
+        Whether the path is taken.
+
+        Outside of simulation the index may miss changes made by other programs (or by
+        the `shell` and `python` actions), so unknown names are checked on disk.
+        """
+        if self.simulate:
+            return self.exists(path)
+        name = os.path.normcase(os.path.basename(_key(path)))
+        if name in self.names(os.path.dirname(_key(path))):
+            return True
+        return os.path.lexists(path)
+
+    def add(self, path: PathLike, origin: Optional[str] = None) -> None:
+        key = _key(path)
+        folder, name = os.path.split(key)
+        if folder in self._names:
+            self._names[folder].add(name)
+        if self.simulate:
+            if key in self._removed:
+                self._removed.discard(key)
+                # a new file or folder, the old contents are gone
+                if origin is None:
+                    self._names[key] = set()
+            if origin is not None and origin != key:
+                self._origins[key] = origin
+
+    def remove(self, path: PathLike) -> None:
+        key = _key(path)
+        folder, name = os.path.split(key)
+        if folder in self._names:
+            self._names[folder].discard(name)
+        # a removed or moved folder takes its contents along
+        if key in self._ancestors or key in self._dirs or key in self._names:
+            prefix = key + os.sep
+            for other in [x for x in self._names if x == key or x.startswith(prefix)]:
+                del self._names[other]
+            self._dirs = {
+                x for x in self._dirs if x != key and not x.startswith(prefix)
+            }
+        if self.simulate:
+            self._removed.add(key)
+            self._origins.pop(key, None)
+        # a lower counter may be free again
+        counter_key = self._candidates.get(folder, {}).get(name)
+        if counter_key is not None:
+            self._counters.get(folder, {}).pop(counter_key, None)
+
+    def resolve(self, path: str) -> Path:
+        """
+        The (cached) resolved path.
+        """
+        result = self._resolved.get(path)
+        if result is None:
+            result = Path(path).resolve()
+            self._resolved[path] = result
+        return result
+
+    def kind(self, path: Path) -> Optional[Literal["dir", "file"]]:
+        """
+        Whether `path` is a folder, any other file or does not exist.
+        """
+        key = _key(path)
+        if key in self._dirs:
+            return "dir"
+        if self.simulate and self.is_removed(key):
+            return None
+        try:
+            st = os.stat(self.real_path(key))
+        except OSError:
+            return None
+        if S_ISDIR(st.st_mode):
+            if self.simulate:
+                self._dirs.add(key)
+                self._remember_ancestors(key)
+            return "dir"
+        return "file"
+
+    def makedirs(self, path: Path) -> None:
+        """
+        Creates the folder and its parents. In simulation the folders are only
+        remembered.
+        """
+        key = _key(path)
+        if self.simulate:
+            if key in self._dirs:
+                return
+            self._remember_ancestors(key)
+        else:
+            path.mkdir(parents=True, exist_ok=True)
+        while key not in self._dirs:
+            if self.simulate:
+                self._dirs.add(key)
+            self.add(key)
+            parent = os.path.dirname(key)
+            if parent == key:
+                break
+            key = parent
+
+    def move(self, src: PathLike, dst: PathLike) -> None:
+        origin = self.real_path(src)
+        self.remove(src)
+        self.add(dst, origin=origin)
+
+    def counter(self, folder: PathLike, template: Any, name: str, ext: str) -> int:
+        return self._counters.get(_key(folder), {}).get((template, name, ext), 2)
+
+    def set_counter(
+        self, folder: PathLike, template: Any, name: str, ext: str, counter: int
+    ) -> None:
+        self._counters.setdefault(_key(folder), {})[(template, name, ext)] = counter
+
+    def add_candidate(
+        self, folder: PathLike, template: Any, name: str, ext: str, candidate: str
+    ) -> None:
+        """
+        Remembers a name tried for the counter of `template`, `name` and `ext`, so
+        removing a file of this name resets the counter.
+        """
+        candidates = self._candidates.setdefault(_key(folder), {})
+        candidates[os.path.normcase(candidate)] = (template, name, ext)
+
+
+_filesystem: Optional[FileSystemView] = None
+
+
+def active_filesystem() -> Optional[FileSystemView]:
+    return _filesystem
+
+
+@contextmanager
+def use_filesystem(simulate: bool) -> Iterator[FileSystemView]:
+    """
+    Enables the filesystem view for the duration of a run.
+    """
+    global _filesystem
+    _filesystem = FileSystemView(simulate=simulate)
+    try:
+        yield _filesystem
+    finally:
+        _filesystem = None
+
+
+def created(path: PathLike, origin: Optional[PathLike] = None) -> None:
+    """
+    Reports a path created by an action, optionally with the path it was copied from.
+    """
+    if _filesystem is not None:
+        _filesystem.add(
+            path,
+            origin=_filesystem.real_path(origin) if origin is not None else None,
+        )
+
+
+def removed(path: PathLike) -> None:
+    """
+    Reports a path removed by an action.
+    """
+    if _filesystem is not None:
+        _filesystem.remove(path)
+
+
+def moved(src: PathLike, dst: PathLike) -> None:
+    """
+    Reports a path moved by an action.
+    """
+    if _filesystem is not None:
+        _filesystem.move(src, dst)
@@ -1,6 +1,13 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, NamedTuple, Protocol, runtime_checkable
+from typing import (
+    TYPE_CHECKING,
+    List,
+    NamedTuple,
+    Protocol,
+    Sequence,
+    runtime_checkable,
+)
 
 from organize.logger import logger
 
@@ -9,10 +16,22 @@ if TYPE_CHECKING:
     from .resource import Resource
 
 
+# Cost tiers of the filters, used to run cheap filters first (`filter_order: cost`)
+COST_NAME = 0  # needs the path only
+COST_STAT = 1  # needs to stat the file
+COST_CONTENT = 2  # reads the file contents or starts other processes
+
+
 class FilterConfig(NamedTuple):
     name: str
     files: bool
     dirs: bool
+    # whether the filter can evaluate multiple resources in parallel (`--jobs`)
+    parallel: bool = True
+    cost: int = COST_CONTENT
+    # whether the filter has no side effects and does not use the variables of other
+    # filters, so it can be evaluated in any order
+    pure: bool = False
 
 
 @runtime_checkable
@@ -24,6 +43,18 @@ class HasFilterPipeline(Protocol):
     def pipeline(self, res: Resource, output: Output) -> bool: ...  # pragma: no cover
 
 
+@runtime_checkable
+class HasPrefetch(Protocol):
+    """
+    Filters may read the data of multiple resources at once before the resources are
+    passed through the filter pipeline one by one.
+    """
+
+    prefetch_size: int
+
+    def prefetch(self, resources: Sequence[Resource]) -> None: ...  # pragma: no cover
+
+
 @runtime_checkable
 class Filter(HasFilterPipeline, HasFilterConfig, Protocol):
     def __init__(self, *args, **kwargs) -> None:
@@ -39,6 +70,21 @@ class Not:
     def pipeline(self, res: Resource, output: Output) -> bool:
         return not self.filter.pipeline(res=res, output=output)
 
+    @property
+    def prefetch_size(self) -> int:
+        if isinstance(self.filter, HasPrefetch):
+            return self.filter.prefetch_size
+        return 0
+
+    def prefetch(self, resources: Sequence[Resource]) -> None:
+        if isinstance(self.filter, HasPrefetch):
+            self.filter.prefetch(resources)
+
+    def close(self) -> None:
+        close = getattr(self.filter, "close", None)
+        if close is not None:
+            close()
+
     def __repr__(self):
         return f"Not({self.filter})"
 
@@ -75,3 +121,35 @@ class Any:
                 output.msg(res=res, level="error", msg=str(e), sender=filter)
                 logger.exception(e)
         return result
+
+
+def is_pure(filter: Filter) -> bool:
+    """
+    Whether the filter can be evaluated in any order.
+
+    Filters whose purity depends on their options define a `pure` property, which
+    takes precedence over `FilterConfig.pure`.
+    """
+    pure = getattr(filter, "pure", None)
+    return filter.filter_config.pure if pure is None else pure
+
+
+def cost_order(filters: Sequence[Filter]) -> List[Filter]:
+    """
+    Orders the filters by cost, so cheap filters can reject a resource before the
+    expensive ones run.
+
+    Filters which are not pure keep their position and no filter is moved across them.
+    Filters of the same cost keep their order.
+    """
+    result: List[Filter] = []
+    pure: List[Filter] = []
+    for filter in filters:
+        if is_pure(filter):
+            pure.append(filter)
+        else:
+            result.extend(sorted(pure, key=lambda x: x.filter_config.cost))
+            result.append(filter)
+            pure = []
+    result.extend(sorted(pure, key=lambda x: x.filter_config.cost))
+    return result
@@ -1,5 +1,4 @@
 from datetime import datetime, tzinfo
-from pathlib import Path
 from typing import ClassVar, Literal, Union
 
 import arrow
@@ -67,7 +66,7 @@ class TimeFilter:
     def pipeline(self, res: Resource, output: Output) -> bool:
         assert res.path is not None, "Does not support standalone mode"
         try:
-            dt = self.get_datetime(res.path)
+            dt = self.get_datetime(res)
         except Exception:
             return False
 
@@ -77,5 +76,5 @@ class TimeFilter:
         res.vars[self.filter_config.name] = dt
         return self.matches_datetime(dt)
 
-    def get_datetime(self, path: Path) -> datetime:
+    def get_datetime(self, res: Resource) -> datetime:
         raise NotImplementedError()
@@ -1,32 +1,124 @@
+import ctypes
+import os
 import subprocess
 import sys
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import ClassVar, Optional
+from typing import Callable, ClassVar, List, Optional
 
-from organize.filter import FilterConfig
+from organize.filter import COST_STAT, FilterConfig
+from organize.resource import Resource
 
 from .common.timefilter import TimeFilter
 
+AT_FDCWD = -100
+STATX_BTIME = 0x800
+
+
+class StatxTimestamp(ctypes.Structure):
+    _fields_ = [
+        ("tv_sec", ctypes.c_int64),
+        ("tv_nsec", ctypes.c_uint32),
+        ("__reserved", ctypes.c_int32),
+    ]
+
+
+class Statx(ctypes.Structure):
+    # see `man 2 statx`. We only need the fields up to `stx_btime`, the rest of the
+    # 256 byte struct is padding.
+    _fields_ = [
+        ("stx_mask", ctypes.c_uint32),
+        ("stx_blksize", ctypes.c_uint32),
+        ("stx_attributes", ctypes.c_uint64),
+        ("stx_nlink", ctypes.c_uint32),
+        ("stx_uid", ctypes.c_uint32),
+        ("stx_gid", ctypes.c_uint32),
+        ("stx_mode", ctypes.c_uint16),
+        ("__spare0", ctypes.c_uint16),
+        ("stx_ino", ctypes.c_uint64),
+        ("stx_size", ctypes.c_uint64),
+        ("stx_blocks", ctypes.c_uint64),
+        ("stx_attributes_mask", ctypes.c_uint64),
+        ("stx_atime", StatxTimestamp),
+        ("stx_btime", StatxTimestamp),
+        ("__padding", ctypes.c_uint8 * 176),
+    ]
+
+
+@lru_cache(maxsize=None)
+def _libc_statx() -> Optional[Callable[..., int]]:
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        func = libc.statx  # glibc >= 2.28
+    except (OSError, AttributeError):
+        return None
+    func.argtypes = (
+        ctypes.c_int,
+        ctypes.c_char_p,
+        ctypes.c_int,
+        ctypes.c_uint,
+        ctypes.POINTER(Statx),
+    )
+    func.restype = ctypes.c_int
+    return func
+
+
+def read_statx_created(path: Path) -> Optional[float]:
+    """
+    Reads the birth time with the `statx` syscall (Linux only).
+
+    Returns `None` if `statx` or the birth time is not available.
+    """
+    statx = _libc_statx()
+    if statx is None:
+        return None
+    buf = Statx()
+    if statx(AT_FDCWD, os.fsencode(path), 0, STATX_BTIME, ctypes.byref(buf)) != 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno), str(path))
+    # the filesystem does not support birth times
+    if not buf.stx_mask & STATX_BTIME:
+        return None
+    return buf.stx_btime.tv_sec + buf.stx_btime.tv_nsec / 1e9
+
+
+STAT_COMMANDS = (
+    ["stat", "--format=%W"],  # GNU coreutils
+    ["stat", "-f %B"],  # BSD
+)
+# The `stat` commands which are usable on this system. Narrowed down to the first
+# working command, so we don't spawn processes which are known to fail.
+_stat_commands: List[List[str]] = list(STAT_COMMANDS)
+
 
 def read_stat_created(path: Path) -> Optional[int]:
-    commands = (
-        ["stat", "--format=%W", str(path)],  # GNU coreutils
-        ["stat", "-f %B", str(path)],  # BSD
-    )
-    for cmd in commands:
+    global _stat_commands
+    for cmd in _stat_commands:
         try:
-            created_str = subprocess.check_output(cmd, encoding="utf-8").strip()
+            created_str = subprocess.check_output(
+                [*cmd, str(path)],
+                encoding="utf-8",
+                stderr=subprocess.DEVNULL,
+            ).strip()
             timestamp = int(created_str)
+            _stat_commands = [cmd]
             return timestamp
-        except subprocess.CalledProcessError:
+        except FileNotFoundError:
+            # the `stat` tool is not installed
+            _stat_commands = []
+            return None
+        except (subprocess.CalledProcessError, ValueError):
             pass
     return None
 
 
-def read_created(path: Path) -> datetime:
+def read_created(path: Path, stat_result: Optional[os.stat_result] = None) -> datetime:
     timestamp = None
-    stat_result = path.stat()
+    if stat_result is None:
+        stat_result = path.stat()
 
     # ctime is the creation time only in Windows.
     # On unix it's the datetime of the last metadata change.
@@ -41,9 +133,14 @@ def read_created(path: Path) -> datetime:
         except AttributeError:
             pass
 
+    # On Linux the birth time is available via `statx` (if supported by the
+    # filesystem).
+    if timestamp is None and _libc_statx() is not None:
+        timestamp = read_statx_created(path)
+
     # If we still haven't gotten a timestamp, we try the (slower) fallback
     # method using the `stat` tool.
-    if timestamp is None:
+    elif timestamp is None:
         timestamp = read_stat_created(path)
 
     # give up.
@@ -77,7 +174,10 @@ class Created(TimeFilter):
         name="created",
         files=True,
         dirs=True,
+        cost=COST_STAT,
+        pure=True,
     )
 
-    def get_datetime(self, path: Path) -> datetime:
-        return read_created(path)
+    def get_datetime(self, res: Resource) -> datetime:
+        assert res.path is not None
+        return read_created(res.path, stat_result=res.stat())
@@ -4,7 +4,8 @@ from datetime import datetime
 from pathlib import Path
 from typing import ClassVar
 
-from organize.filter import FilterConfig
+from organize.filter import COST_CONTENT, FilterConfig
+from organize.resource import Resource
 
 from .common.timefilter import TimeFilter
 
@@ -42,6 +43,8 @@ class DateAdded(TimeFilter):
         name="date_added",
         files=True,
         dirs=True,
+        cost=COST_CONTENT,
+        pure=True,
     )
 
     def __post_init__(self):
@@ -49,5 +52,6 @@ class DateAdded(TimeFilter):
             raise EnvironmentError("date_added is only available on macOS")
         return super().__post_init__()
 
-    def get_datetime(self, path: Path) -> datetime:
-        return read_date_added(path)
+    def get_datetime(self, res: Resource) -> datetime:
+        assert res.path is not None
+        return read_date_added(res.path)
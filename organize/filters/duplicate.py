@@ -8,13 +8,27 @@ Which was updated for python3 in:
     https://gist.github.com/tfeldmann/fc875e6630d11f2256e746f67a09c1ae
 """
 
+import os
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Callable, ClassVar, Literal, NamedTuple, Tuple
-
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    List,
+    Literal,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from pydantic import Field
 from pydantic.config import ConfigDict
 from pydantic.dataclasses import dataclass
 
+from organize.cache import DuplicateIndex
 from organize.filter import FilterConfig
 from organize.filters.created import read_created
 from organize.filters.hash import hash, hash_first_chunk
@@ -105,6 +119,20 @@ class Duplicate:
             - `"lastmodified"`: The first file sorted by date of last modification is
                the original.
 
+        index (str):
+            Path to a database of known files (optional). Files are checked for
+            duplicates against the files in the index, so you don't have to walk a
+            large archive again in every run. Files which vanished are removed from
+            the index automatically.
+        update_index (bool):
+            Whether to add the handled files to the index (Default: true). Set this to
+            false to use the index as a read-only reference.
+            A file found in the index is always the original, so the actions never
+            touch the files of the index.
+        hash_workers (int):
+            The number of threads used to hash files with the same size in parallel.
+            (Default: 1)
+
     You can reverse the sorting method by prefixing a `-`.
 
     So with `detect_original_by: "-created"` the file with the older creation date is
@@ -118,9 +146,12 @@ class Duplicate:
 
     detect_original_by: DetectionMethod = "first_seen"
     hash_algorithm: str = "sha1"
+    index: Optional[str] = None
+    update_index: bool = True
+    hash_workers: int = Field(default=1, ge=1)
 
     filter_config: ClassVar[FilterConfig] = FilterConfig(
-        name="duplicate", files=True, dirs=False
+        name="duplicate", files=True, dirs=False, parallel=False
     )
 
     def __post_init__(self):
@@ -140,6 +171,53 @@ class Duplicate:
         self._seen_files = set()
         self._first_chunk_known = set()
         self._hash_known = set()
+        # the originals found in the persistent index
+        self._from_index = set()
+
+        # the persistent index and the hashing threads are started on first use
+        self._index: Optional[DuplicateIndex] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_index(self) -> Optional[DuplicateIndex]:
+        if self.index is not None and self._index is None:
+            self._index = DuplicateIndex(
+                path=os.path.expanduser(self.index),
+                algo=self.hash_algorithm,
+            )
+        return self._index
+
+    def flush(self) -> None:
+        """
+        Commits the pending changes of the index.
+        """
+        if self._index is not None:
+            self._index.commit()
+
+    def close(self) -> None:
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _hash_many(
+        self, func: Callable[[Path, str], str], paths: Sequence[Path]
+    ) -> List[str]:
+        """
+        Hashes the given files with `func` - in parallel if `hash_workers` > 1.
+        The results are returned in the order of `paths`.
+        """
+        if self.hash_workers == 1 or len(paths) < 2:
+            return [func(path, self.hash_algorithm) for path in paths]
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.hash_workers,
+                thread_name_prefix="organize-hash",
+            )
+        return list(
+            self._executor.map(lambda path: func(path, self.hash_algorithm), paths)
+        )
 
     def pipeline(self, res: Resource, output: Output) -> bool:
         assert res.path is not None, "Does not support standalone mode"
@@ -155,55 +233,114 @@ class Duplicate:
 
         self._seen_files.add(res.path)
 
+        match = self._find_known(res.path)
+        index = self._get_index()
+        if index is not None:
+            match = self._check_index(index, res.path, match)
+
+        if match:
+            known, hash_ = match
+            if known in self._from_index:
+                # the indexed file may lie outside of the walked locations
+                original, duplicate = known, res.path
+            else:
+                original, duplicate = detect_original(
+                    known=known,
+                    new=res.path,
+                    method=self._detect_original_by,
+                    reverse=self._detect_original_reverse,
+                )
+            if known != original or known not in self._hash_known:
+                self._file_for_hash[hash_] = original
+
+            res.path = duplicate
+            res.vars[self.filter_config.name] = {"original": original}
+            return True
+
+        return False
+
+    def _find_known(self, path: Path) -> Optional[Tuple[Path, str]]:
+        """
+        Returns a file seen in this run with the same content as `path` and the hash.
+        """
         # check for files with equal size
-        file_size = read_file_size(path=res.path)
+        file_size = read_file_size(path=path)
         same_size = self._files_for_size[file_size]
-        same_size.append(res.path)
+        same_size.append(path)
         if len(same_size) == 1:
             # the file is unique in size and cannot be a duplicate
-            return False
+            return None
 
         # for all other files with the same file size:
-        # make sure we know their hash of their first 1024 byte chunk
-        for f in same_size[:-1]:
-            if f not in self._first_chunk_known:
-                chunk_hash = hash_first_chunk(f, algo=self.hash_algorithm)
-                self._first_chunk_known.add(f)
-                self._files_for_chunk[chunk_hash].append(f)
+        # make sure we know their hash of their first 1024 byte chunk.
+        # The current file is hashed in the same batch.
+        unknown = [f for f in same_size[:-1] if f not in self._first_chunk_known]
+        *chunk_hashes, chunk_hash = self._hash_many(hash_first_chunk, [*unknown, path])
+        for f, f_chunk_hash in zip(unknown, chunk_hashes):
+            self._first_chunk_known.add(f)
+            self._files_for_chunk[f_chunk_hash].append(f)
 
         # check first chunk hash collisions with the current file
-        chunk_hash = hash_first_chunk(res.path, algo=self.hash_algorithm)
         same_first_chunk = self._files_for_chunk[chunk_hash]
-        same_first_chunk.append(res.path)
-        self._first_chunk_known.add(res.path)
+        same_first_chunk.append(path)
+        self._first_chunk_known.add(path)
         if len(same_first_chunk) == 1:
             # the file has a unique small hash and cannot be a duplicate
-            return False
+            return None
 
         # Ensure we know the full hashes of all files with the same first chunk as
         # the investigated file
-        for f in same_first_chunk[:-1]:
-            if f not in self._hash_known:
-                hash_ = hash(f, algo=self.hash_algorithm)
-                self._hash_known.add(f)
-                self._file_for_hash[hash_] = f
+        unknown = [f for f in same_first_chunk[:-1] if f not in self._hash_known]
+        *hashes, hash_ = self._hash_many(hash, [*unknown, path])
+        for f, f_hash in zip(unknown, hashes):
+            self._hash_known.add(f)
+            self._file_for_hash[f_hash] = f
 
         # check full hash collisions with the current file
-        hash_ = hash(res.path, algo=self.hash_algorithm)
-        self._hash_known.add(res.path)
+        self._hash_known.add(path)
         known = self._file_for_hash.get(hash_)
         if known:
-            original, duplicate = detect_original(
-                known=known,
-                new=res.path,
-                method=self._detect_original_by,
-                reverse=self._detect_original_reverse,
+            return (known, hash_)
+        # the file is unique so far. Later files with the same content are compared
+        # against this one.
+        self._file_for_hash[hash_] = path
+        return None
+
+    def _check_index(
+        self,
+        index: DuplicateIndex,
+        path: Path,
+        match: Optional[Tuple[Path, str]],
+    ) -> Optional[Tuple[Path, str]]:
+        """
+        Looks up `path` in the persistent index (if it is no duplicate within this
+        run) and adds it to the index.
+        """
+        abspath = path.absolute()
+        stat = abspath.stat()
+        if match is None:
+            known = index.find(
+                abspath,
+                size=stat.st_size,
+                chunk_hash=lambda p: hash_first_chunk(p, algo=self.hash_algorithm),
+                full_hash=lambda p: hash(p, algo=self.hash_algorithm),
             )
-            if known != original:
-                self._file_for_hash[hash_] = original
-
-            res.path = duplicate
-            res.vars[self.filter_config.name] = {"original": original}
-            return True
-
-        return False
+            if known is not None:
+                # register the hashes so later files in this run can be compared
+                # without reading this file again.
+                if path not in self._first_chunk_known:
+                    chunk_hash = hash_first_chunk(path, algo=self.hash_algorithm)
+                    self._first_chunk_known.add(path)
+                    self._files_for_chunk[chunk_hash].append(path)
+                self._hash_known.add(path)
+                self._from_index.add(known)
+                match = (known, hash(path, algo=self.hash_algorithm))
+
+        if self.update_index:
+            index.add(
+                abspath,
+                size=stat.st_size,
+                mtime_ns=stat.st_mtime_ns,
+                full_hash=match[1] if match else None,
+            )
+        return match
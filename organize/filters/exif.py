@@ -3,16 +3,17 @@ import fnmatch
 import json
 import os
 import subprocess
+import threading
 from datetime import date, datetime, timedelta
 from functools import lru_cache
 from pathlib import Path
-from typing import Any, ClassVar, DefaultDict, Dict, Optional, Union
+from typing import IO, Any, ClassVar, DefaultDict, Dict, List, Optional, Sequence, Union
 
 import exifread
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 from rich import print
 
-from organize.filter import FilterConfig
+from organize.filter import COST_CONTENT, FilterConfig
 from organize.logger import logger
 from organize.output import Output
 from organize.resource import Resource
@@ -132,32 +133,148 @@ def exifread_read(path: Path) -> ExifStrDict:
     return grouped
 
 
-def exiftool_read(path: Path) -> ExifStrDict:
+EXIFTOOL_ARGS = ("-j", "-g", "--fast")
+
+
+class ExifTool:
     """
-    Uses the `exiftool` tool by Phil Harvey to read the EXIF data
+    A long-lived exiftool process in `-stay_open` batch mode.
+
+    Starting exiftool (a perl program) is slow, so we keep a single process running
+    and stream the requests via stdin. The process is (re-)started on demand.
     """
-    try:
-        data_json = subprocess.check_output(
-            (
-                ORGANIZE_EXIFTOOL_PATH,
-                "-j",
-                "-g",
-                "--fast",
-                str(path),
-            ),
-            text=True,
+
+    READY = "{ready}"
+
+    def __init__(self, executable: str = ORGANIZE_EXIFTOOL_PATH):
+        self.executable = executable
+        self._process: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+
+    def is_running(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def start(self) -> None:
+        self._process = subprocess.Popen(
+            (self.executable, "-stay_open", "True", "-@", "-"),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            encoding="utf-8",
         )
-    except subprocess.CalledProcessError:
+
+    def close(self) -> None:
+        if self._process is None:
+            return
+        process, self._process = self._process, None
+        try:
+            assert process.stdin is not None
+            process.stdin.write("-stay_open\nFalse\n")
+            process.stdin.flush()
+            process.stdin.close()
+            process.wait(timeout=5)
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            process.kill()
+            process.wait()
+
+    def _communicate(self, args) -> str:
+        if not self.is_running():
+            self.start()
+        assert self._process is not None
+        stdin: IO[str] = self._process.stdin  # type: ignore
+        stdout: IO[str] = self._process.stdout  # type: ignore
+        stdin.write("".join(f"{arg}\n" for arg in args) + "-execute\n")
+        stdin.flush()
+        lines: List[str] = []
+        for line in stdout:
+            if line.rstrip() == self.READY:
+                return "".join(lines)
+            lines.append(line)
+        raise BrokenPipeError("exiftool terminated unexpectedly")
+
+    def execute(self, *args: str) -> str:
+        """
+        Runs exiftool with the given arguments and returns its output.
+        Restarts the process once if it crashed.
+        """
+        with self._lock:
+            try:
+                return self._communicate(args)
+            except (OSError, ValueError):
+                logger.warning("exiftool crashed. Restarting.")
+                self.close()
+                return self._communicate(args)
+
+
+def exiftool_read(path: Path, exiftool: Optional[ExifTool] = None) -> ExifStrDict:
+    """
+    Uses the `exiftool` tool by Phil Harvey to read the EXIF data.
+
+    If an `ExifTool` instance is given, its process is used instead of starting
+    a new one.
+    """
+    try:
+        if exiftool is not None:
+            data_json = exiftool.execute(*EXIFTOOL_ARGS, str(path))
+        else:
+            data_json = subprocess.check_output(
+                (ORGANIZE_EXIFTOOL_PATH, *EXIFTOOL_ARGS, str(path)),
+                text=True,
+            )
+    except (subprocess.CalledProcessError, OSError, ValueError):
+        return dict()
+
+    # exiftool does not output anything if the file cannot be read
+    if not data_json.strip():
         return dict()
 
     # we pass a single filepath, so we are interested in the first element
-    data: Dict = json.loads(data_json)[0]
+    return _exiftool_result(json.loads(data_json)[0])
 
+
+def exiftool_read_many(
+    paths: Sequence[Path], exiftool: Optional[ExifTool] = None
+) -> Dict[Path, ExifStrDict]:
+    """
+    Reads the EXIF data of multiple files with a single exiftool call.
+
+    Only the files reported by exiftool are returned. If the batch fails, the result
+    is empty, so the files can still be read one by one.
+    """
+    result: Dict[Path, ExifStrDict] = {}
+    args = (*EXIFTOOL_ARGS, *(str(path) for path in paths))
+    try:
+        if exiftool is not None:
+            data_json = exiftool.execute(*args)
+        else:
+            data_json = subprocess.check_output(
+                (ORGANIZE_EXIFTOOL_PATH, *args),
+                text=True,
+            )
+    except subprocess.CalledProcessError as e:
+        # exiftool exits with an error if a single file fails, but the output of
+        # the other files is still valid.
+        data_json = e.output or ""
+    except (OSError, ValueError):
+        return result
+
+    if not data_json.strip():
+        return result
+    try:
+        items = json.loads(data_json)
+    except ValueError:
+        logger.warning("Cannot parse exiftool output.")
+        return result
+    for data in items:
+        result[Path(data["SourceFile"])] = _exiftool_result(data)
+    return result
+
+
+def _exiftool_result(data: Dict) -> ExifStrDict:
     # if the result only contains "File", "SourceFile" and "ExifTool" it means exiftool
     # couldn't find any additional data about this file.
     if set(data.keys()) == set(["SourceFile", "ExifTool", "File"]):
         return dict()
-
     return data
 
 
@@ -206,6 +323,10 @@ class Exif(BaseModel):
 
     Attributes:
         lowercase_keys (bool): Whether to lowercase all EXIF keys (Default: true)
+        batch_size (int):
+            Only used with `exiftool`. If greater than zero, the EXIF data of this many
+            files is read ahead with a single `exiftool` call. This speeds up reading
+            from slow (network) storage. (Default: 0 / disabled)
 
     :returns:
         ``{exif}`` -- a dict of all the collected exif inforamtion available in the
@@ -219,11 +340,17 @@ class Exif(BaseModel):
 
     filter_tags: Dict
     lowercase_keys: bool = True
+    batch_size: int = 0
+
+    _exiftool: ExifTool = PrivateAttr(default_factory=ExifTool)
+    _prefetched: Dict[Path, ExifStrDict] = PrivateAttr(default_factory=dict)
 
     filter_config: ClassVar[FilterConfig] = FilterConfig(
         name="exif",
         files=True,
         dirs=False,
+        cost=COST_CONTENT,
+        pure=True,
     )
 
     def __init__(
@@ -231,6 +358,7 @@ class Exif(BaseModel):
         *args,
         filter_tags: Optional[Dict] = None,
         lowercase_keys: bool = True,
+        batch_size: int = 0,
         **kwargs,
     ):
         # exif filter is used differently from other filters. The **kwargs are not
@@ -241,14 +369,32 @@ class Exif(BaseModel):
         # *args are tags filtered without a value, like ["gps", "image.model"].
         for arg in args:
             params[arg] = None
-        super().__init__(filter_tags=params, lowercase_keys=lowercase_keys)
+        super().__init__(
+            filter_tags=params,
+            lowercase_keys=lowercase_keys,
+            batch_size=batch_size,
+        )
+
+    @property
+    def prefetch_size(self) -> int:
+        if not exiftool_available():
+            return 0
+        return self.batch_size
+
+    def prefetch(self, resources: Sequence[Resource]) -> None:
+        # results of the previous window are dropped, so we don't keep the data of
+        # files which were filtered out by previous filters.
+        paths = [res.path for res in resources if res.path is not None]
+        self._prefetched = exiftool_read_many(paths, exiftool=self._exiftool)
 
     def pipeline(self, res: Resource, output: Output) -> bool:
         assert res.path is not None, "Does not support standalone mode"
 
         # gather the exif data in a dict
-        if exiftool_available():
-            data = exiftool_read(path=res.path)
+        if res.path in self._prefetched:
+            data = self._prefetched.pop(res.path)
+        elif exiftool_available():
+            data = exiftool_read(path=res.path, exiftool=self._exiftool)
         else:
             data = exifread_read(path=res.path)
 
@@ -262,6 +408,9 @@ class Exif(BaseModel):
         res.vars[self.filter_config.name] = parsed
         return matches_tags(self.filter_tags, data)
 
+    def close(self) -> None:
+        self._exiftool.close()
+
 
 if __name__ == "__main__":
     import sys
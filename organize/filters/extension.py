@@ -5,7 +5,7 @@ from pydantic import Field, field_validator
 from pydantic.config import ConfigDict
 from pydantic.dataclasses import dataclass
 
-from organize.filter import FilterConfig
+from organize.filter import COST_NAME, FilterConfig
 from organize.output import Output
 from organize.resource import Resource
 from organize.validators import flatten
@@ -46,6 +46,8 @@ class Extension:
         name="extension",
         files=True,
         dirs=False,
+        cost=COST_NAME,
+        pure=True,
     )
 
     @field_validator("extensions", mode="before")
@@ -1,13 +1,26 @@
+import codecs
+import io
 import re
 import subprocess
-from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Callable, ClassVar, Dict, Union
-
+from typing import (
+    Callable,
+    ClassVar,
+    Dict,
+    Iterator,
+    Optional,
+    Sequence,
+    Union,
+)
+
+from pydantic import Field
 from pydantic.config import ConfigDict
 from pydantic.dataclasses import dataclass
 
-from organize.filter import FilterConfig
+from organize.cache import TextCacheSettings, active_text_cache, use_text_cache
+from organize.filter import COST_CONTENT, FilterConfig
 from organize.logger import logger
 from organize.output import Output
 from organize.resource import Resource
@@ -38,6 +51,90 @@ def extract_txt(path: Path) -> str:
     return path.read_text(encoding="utf-8")
 
 
+# The size of the windows read when streaming text files and how much of the previous
+# window is searched again, so matches spanning two windows are found.
+STREAM_CHUNK_SIZE = 1024 * 1024
+STREAM_OVERLAP = 64 * 1024
+
+
+def _text_decoder() -> io.IncrementalNewlineDecoder:
+    # decodes utf-8 with universal newlines, like `Path.read_text`. An incomplete
+    # character or "\r" at the end is kept until more data is decoded.
+    return io.IncrementalNewlineDecoder(
+        codecs.getincrementaldecoder("utf-8")(), translate=True
+    )
+
+
+def _overlap(window: str, size: int) -> str:
+    if len(window) <= size:
+        return window
+    tail = window[-size:]
+    # start the overlap at a line start so `^` matches as expected
+    nl = tail.find("\n")
+    return tail[nl + 1 :] if nl != -1 else tail
+
+
+def iter_text_windows(
+    path: Path,
+    max_bytes: Optional[int] = None,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+    overlap: int = STREAM_OVERLAP,
+) -> Iterator[str]:
+    """
+    Reads a utf-8 text file in overlapping windows ending at line breaks.
+
+    Only the first `max_bytes` bytes are read, if given.
+    """
+    decoder = _text_decoder()
+    remaining = max_bytes
+    previous = ""
+    pending = ""
+    yielded = False
+    with path.open("rb") as f:
+        while remaining is None or remaining > 0:
+            size = chunk_size if remaining is None else min(chunk_size, remaining)
+            data = f.read(size)
+            if not data:
+                break
+            if remaining is not None:
+                remaining -= len(data)
+            pending += decoder.decode(data)
+            cut = pending.rfind("\n") + 1
+            if not cut:
+                # no line break yet. Wait for more data unless the line is huge.
+                if len(pending) < chunk_size:
+                    continue
+                cut = len(pending)
+            window, pending = pending[:cut], pending[cut:]
+            yield previous + window
+            yielded = True
+            previous = _overlap(window, overlap)
+    if pending or not yielded:
+        yield previous + pending
+
+
+def search_text(
+    path: Path,
+    expr: re.Pattern,
+    max_bytes: Optional[int] = None,
+    stream: bool = False,
+) -> Optional[re.Match]:
+    """
+    Searches a utf-8 text file without reading it completely into memory if
+    `stream` is given. Stops at the first match.
+    """
+    if not stream:
+        with path.open("rb") as f:
+            data = f.read() if max_bytes is None else f.read(max_bytes)
+        # an incomplete character at the end is dropped by the incremental decoder
+        return expr.search(_text_decoder().decode(data))
+    for window in iter_text_windows(path, max_bytes=max_bytes):
+        match = expr.search(window)
+        if match:
+            return match
+    return None
+
+
 @lru_cache(maxsize=1)
 def _pdftotext_available() -> bool:
     # check whether the given path is executable
@@ -47,29 +144,42 @@ def _pdftotext_available() -> bool:
     return ok
 
 
-def _extract_with_pdftotext(path: Path, keep_layout: bool) -> str:
+def _extract_with_pdftotext(
+    path: Path,
+    keep_layout: bool,
+    max_pages: Optional[int] = None,
+) -> str:
+    args = []
     if keep_layout:
-        args = ["-layout", str(path), "-"]
-    else:
-        args = [str(path), "-"]
+        args.append("-layout")
+    if max_pages is not None:
+        args.extend(("-l", str(max_pages)))
     result = subprocess.check_output(
-        ("pdftotext", *args),
+        ("pdftotext", *args, str(path), "-"),
         text=True,
         stderr=subprocess.DEVNULL,
     )
     return clean(result)
 
 
-def _extract_with_pdfminer(path: Path) -> str:
+def _extract_with_pdfminer(path: Path, max_pages: Optional[int] = None) -> str:
     from pdfminer import high_level
 
-    return clean(high_level.extract_text(path))
+    return clean(high_level.extract_text(path, maxpages=max_pages or 0))
 
 
-def extract_pdf(path: Path, keep_layout: bool = True) -> str:
+def extract_pdf(
+    path: Path,
+    keep_layout: bool = True,
+    max_pages: Optional[int] = None,
+) -> str:
     if _pdftotext_available():
-        return _extract_with_pdftotext(path=path, keep_layout=keep_layout)
-    return _extract_with_pdfminer(path=path)
+        return _extract_with_pdftotext(
+            path=path,
+            keep_layout=keep_layout,
+            max_pages=max_pages,
+        )
+    return _extract_with_pdfminer(path=path, max_pages=max_pages)
 
 
 def extract_docx(path: Path) -> str:
@@ -88,9 +198,23 @@ EXTRACTORS: Dict[str, Callable[[Path], str]] = {
 }
 
 
-def textract(path: Path) -> str:
-    extractor = EXTRACTORS[path.suffix.lower()]
-    return extractor(path)
+def textract(path: Path, max_pages: Optional[int] = None) -> str:
+    """
+    Extracts the text of the given file.
+
+    `max_pages` limits the extraction to the first pages of PDF files.
+    """
+    suffix = path.suffix.lower()
+    extractor = EXTRACTORS[suffix]
+    kind = suffix
+    if suffix == ".pdf" and max_pages is not None:
+        extractor = partial(extract_pdf, max_pages=max_pages)
+        kind = f"{suffix}:pages={max_pages}"
+
+    cache = active_text_cache()
+    if cache is None:
+        return extractor(path)
+    return cache.text(path, kind=kind, extract=lambda: extractor(path))
 
 
 @dataclass(config=ConfigDict(coerce_numbers_to_str=True, extra="forbid"))
@@ -104,6 +228,20 @@ class FileContent:
 
     Attributes:
         expr (str): The regular expression to be matched.
+        stream (bool):
+            Search text files (.md, .txt, .log) in windows of 1 MB instead of reading
+            them into memory and stop at the first match. Useful for huge log files.
+            Matches must not be longer than 64 kB in this mode. (default: false)
+        max_bytes (int):
+            Only search the first `max_bytes` bytes of text files. (default: search
+            the whole file)
+        max_pages (int):
+            Only extract the text of the first `max_pages` pages of PDF files.
+            (default: all pages)
+        workers (int):
+            Extract the text of this many PDF / DOCX files at once. The files are
+            read ahead in the walk order, so files excluded by previous filters
+            may be extracted as well. (default: 1)
 
     Any named groups (`(?P<groupname>.*)`) in your regular expression will
     be returned like this:
@@ -118,22 +256,69 @@ class FileContent:
     ```sh
     python -m organize.filters.filecontent "/path/to/file.pdf"
     ```
+
+    Add `--text-cache` to use the persistent text cache.
     """
 
     expr: str = r"(?P<all>.*)"
+    stream: bool = False
+    max_bytes: Optional[int] = Field(default=None, ge=0)
+    max_pages: Optional[int] = Field(default=None, ge=1)
+    workers: int = Field(default=1, ge=1)
 
     filter_config: ClassVar[FilterConfig] = FilterConfig(
         name="filecontent",
         files=True,
         dirs=False,
+        cost=COST_CONTENT,
+        pure=True,
     )
 
     def __post_init__(self):
         self._expr = re.compile(self.expr, re.MULTILINE | re.DOTALL)
+        self._prefetched: Dict[Path, Optional[str]] = {}
+
+    @property
+    def prefetch_size(self) -> int:
+        if self.workers == 1:
+            return 0
+        return 4 * self.workers
+
+    def _extract(self, path: Path) -> Optional[str]:
+        try:
+            return textract(path, max_pages=self.max_pages)
+        except Exception:
+            return None
+
+    def prefetch(self, resources: Sequence[Resource]) -> None:
+        # plain text files are cheap to read and may be streamed
+        paths = [
+            res.path
+            for res in resources
+            if res.path is not None
+            and EXTRACTORS.get(res.path.suffix.lower()) not in (None, extract_txt)
+        ]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            # results of the previous window are dropped, so we don't keep the texts
+            # of files which were filtered out by previous filters.
+            self._prefetched = dict(zip(paths, pool.map(self._extract, paths)))
 
     def matches(self, path: Path) -> Union[re.Match, None]:
         try:
-            content = textract(path)
+            is_text = EXTRACTORS.get(path.suffix.lower()) is extract_txt
+            if is_text and (self.stream or self.max_bytes is not None):
+                return search_text(
+                    path,
+                    expr=self._expr,
+                    max_bytes=self.max_bytes,
+                    stream=self.stream,
+                )
+            if path in self._prefetched:
+                content = self._prefetched.pop(path)
+                if content is None:
+                    return None
+            else:
+                content = textract(path, max_pages=self.max_pages)
             match = self._expr.search(content)
             return match
         except Exception:
@@ -149,6 +334,12 @@ class FileContent:
 
 
 if __name__ == "__main__":
-    import sys
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--text-cache", action="store_true")
+    args = parser.parse_args()
 
-    print(textract(Path(sys.argv[1])))
+    with use_text_cache(TextCacheSettings() if args.text_cache else None):
+        print(textract(args.path))
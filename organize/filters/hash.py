@@ -5,13 +5,38 @@ from typing import ClassVar
 from pydantic.config import ConfigDict
 from pydantic.dataclasses import dataclass
 
-from organize.filter import FilterConfig
+from organize.cache import active_hash_cache
+from organize.filter import COST_CONTENT, FilterConfig
 from organize.output import Output
 from organize.resource import Resource
-from organize.template import Template, render
+from organize.template import compile_template, render
 
 
 def hash(path: Path, algo: str, *, _bufsize=2**18) -> str:
+    cache = active_hash_cache()
+    if cache is not None:
+        return cache.digest(
+            path,
+            kind="full",
+            algo=algo,
+            compute=lambda: _hash(path, algo, _bufsize=_bufsize),
+        )
+    return _hash(path, algo, _bufsize=_bufsize)
+
+
+def hash_first_chunk(path: Path, algo: str, *, chunksize=1024) -> str:
+    cache = active_hash_cache()
+    if cache is not None:
+        return cache.digest(
+            path,
+            kind=f"chunk{chunksize}",
+            algo=algo,
+            compute=lambda: _hash_first_chunk(path, algo, chunksize=chunksize),
+        )
+    return _hash_first_chunk(path, algo, chunksize=chunksize)
+
+
+def _hash(path: Path, algo: str, *, _bufsize: int) -> str:
     # for python >= 3.11 we can use hashlib.file_digest
     if hasattr(hashlib, "file_digest"):
         with path.open("rb") as f:
@@ -27,7 +52,7 @@ def hash(path: Path, algo: str, *, _bufsize=2**18) -> str:
     return h.hexdigest()
 
 
-def hash_first_chunk(path: Path, algo: str, *, chunksize=1024) -> str:
+def _hash_first_chunk(path: Path, algo: str, *, chunksize: int) -> str:
     h = hashlib.new(algo)
     with path.open("rb") as f:
         chunk = f.read(chunksize)
@@ -73,10 +98,17 @@ class Hash:
         name="hash",
         files=True,
         dirs=False,
+        cost=COST_CONTENT,
+        pure=False,
     )
 
     def __post_init__(self):
-        self._algorithm = Template.from_string(self.algorithm)
+        self._algorithm = compile_template(self.algorithm)
+
+    @property
+    def pure(self) -> bool:
+        # a templated algorithm may use the variables of other filters
+        return self._algorithm.constant_text is not None
 
     def pipeline(self, res: Resource, output: Output) -> bool:
         assert res.path is not None
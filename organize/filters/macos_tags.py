@@ -5,7 +5,7 @@ from pydantic import Field, field_validator
 from pydantic.config import ConfigDict
 from pydantic.dataclasses import dataclass
 
-from organize.filter import FilterConfig
+from organize.filter import COST_STAT, FilterConfig
 from organize.output import Output
 from organize.resource import Resource
 from organize.utils import glob_match
@@ -44,6 +44,8 @@ class MacOSTags:
         name="macos_tags",
         files=True,
         dirs=True,
+        cost=COST_STAT,
+        pure=True,
     )
 
     def __post_init__(self):
@@ -1,5 +1,5 @@
 import textwrap
-from typing import ClassVar, Dict, Optional
+from typing import ClassVar
 
 from pydantic import field_validator
 from pydantic.config import ConfigDict
@@ -8,6 +8,7 @@ from pydantic.dataclasses import dataclass
 from organize.filter import FilterConfig
 from organize.output import Output
 from organize.resource import Resource
+from organize.utils import UserCode, compile_usercode
 
 
 @dataclass(config=ConfigDict(coerce_numbers_to_str=True, extra="forbid"))
@@ -36,6 +37,7 @@ class Python:
         name="python",
         files=True,
         dirs=True,
+        parallel=False,
     )
 
     @field_validator("code", mode="after")
@@ -43,13 +45,13 @@ class Python:
     def must_have_return_statement(cls, value):
         if "return" not in value:
             raise ValueError("No return statement found in your code!")
+        # check for syntax errors
+        compile_usercode(textwrap.dedent(value))
         return value
 
     def __post_init__(self):
         self.code = textwrap.dedent(self.code)
-
-    def __usercode__(self, print, **kwargs) -> Optional[Dict]:
-        raise NotImplementedError()
+        self._usercode = UserCode(self.code)
 
     def pipeline(self, res: Resource, output: Output) -> bool:
         def _output_msg(*values, sep: str = " ", end: str = ""):
@@ -62,14 +64,7 @@ class Python:
                 sender="python",
             )
 
-        # codegen the user function with arguments as available in the resource
-        kwargs = ", ".join(res.dict().keys())
-        func = f"def __userfunc(print, {kwargs}):\n"
-        func += textwrap.indent(self.code, "    ")
-        func += "\n\nself.__usercode__ = __userfunc"
-
-        exec(func, globals().copy(), locals().copy())
-        result = self.__usercode__(print=_output_msg, **res.dict())
+        result = self._usercode(print=_output_msg, kwargs=res.dict())
 
         if isinstance(result, dict):
             res.deep_merge(key=self.filter_config.name, data=result)
@@ -4,6 +4,7 @@ from pydantic import ConfigDict, Field
 from pydantic.dataclasses import dataclass
 
 from .validators import FlatList, FlatSet
+from .walker import Sort
 
 DEFAULT_SYSTEM_EXCLUDE_FILES = {
     "thumbs.db",
@@ -36,3 +37,7 @@ class Location:
     filter: Union[List[str], None] = None
     filter_dirs: Union[List[str], None] = None
     ignore_errors: bool = False
+    scan_workers: int = Field(default=0, ge=0)
+    sort: Sort = "natural"
+    stream: bool = False
+    incremental: bool = False
@@ -1,9 +1,13 @@
+from .buffered import BufferedOutput
+from .counting import ErrorCountingOutput
 from .default import Default
 from .jsonl import JSONL
 from .output import Output
 from .saving import SavingOutput
 
 __all__ = (
+    "BufferedOutput",
+    "ErrorCountingOutput",
     "JSONL",
     "Output",
     "SavingOutput",
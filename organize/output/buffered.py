@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING, List, NamedTuple, Optional
+
+from .output import Level, Output
+
+if TYPE_CHECKING:
+    from organize.resource import Resource
+
+    from ._sender import SenderType
+
+
+class BufferedMsg(NamedTuple):
+    res: Resource
+    msg: str
+    sender: SenderType
+    level: Level
+
+
+class BufferedOutput:
+    """
+    Collects the messages of a resource handled in a worker thread so they can be
+    passed to the real output later on, in order.
+    """
+
+    def __init__(self) -> None:
+        self.messages: List[BufferedMsg] = []
+
+    def start(
+        self,
+        simulate: bool,
+        config_path: Optional[Path],
+        working_dir: Path,
+    ) -> None:
+        pass
+
+    def msg(
+        self,
+        res: Resource,
+        msg: str,
+        sender: SenderType,
+        level: Level = "info",
+    ) -> None:
+        self.messages.append(BufferedMsg(res=res, msg=msg, sender=sender, level=level))
+
+    def confirm(
+        self,
+        res: Resource,
+        msg: str,
+        default: bool,
+        sender: SenderType,
+    ) -> bool:
+        raise RuntimeError("Confirmations are not supported in worker threads.")
+
+    def end(self, success_count: int, error_count: int) -> None:
+        pass
+
+    def replay(self, output: Output) -> None:
+        for x in self.messages:
+            output.msg(res=x.res, msg=x.msg, sender=x.sender, level=x.level)
+        self.messages.clear()
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from .output import Level, Output
+
+if TYPE_CHECKING:
+    from organize.resource import Resource
+
+    from ._sender import SenderType
+
+
+class ErrorCountingOutput:
+    """
+    Passes everything on to another output and counts the error messages, including
+    the errors of filters which are not part of the rule's summary.
+    """
+
+    def __init__(self, output: Output) -> None:
+        self.output = output
+        self.errors = 0
+
+    def start(
+        self,
+        simulate: bool,
+        config_path: Optional[Path],
+        working_dir: Path,
+    ) -> None:
+        self.output.start(
+            simulate=simulate,
+            config_path=config_path,
+            working_dir=working_dir,
+        )
+
+    def msg(
+        self,
+        res: Resource,
+        msg: str,
+        sender: SenderType,
+        level: Level = "info",
+    ) -> None:
+        if level == "error":
+            self.errors += 1
+        self.output.msg(res=res, msg=msg, sender=sender, level=level)
+
+    def confirm(
+        self,
+        res: Resource,
+        msg: str,
+        default: bool,
+        sender: SenderType,
+    ) -> bool:
+        return self.output.confirm(res=res, msg=msg, default=default, sender=sender)
+
+    def end(self, success_count: int, error_count: int) -> None:
+        self.output.end(success_count, error_count)
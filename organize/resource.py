@@ -1,8 +1,20 @@
 from __future__ import annotations
 
+import os
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Dict, Optional, Set
+from stat import S_ISDIR, S_ISREG
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    Iterator,
+    Mapping,
+    Optional,
+    Set,
+)
 
 from organize.utils import deep_merge
 
@@ -30,6 +42,9 @@ class Resource:
     :param walker_skip_files:
         Filters and actions may add pathes to this set which are then ignored for the
         rest of the rule.
+
+    The file type and stat result of the path are cached. The cache is cleared when
+    the path changes.
     """
 
     path: Optional[Path]
@@ -39,6 +54,30 @@ class Resource:
     vars: Dict[str, Any] = field(default_factory=dict)
     walker_skip_pathes: Set[Path] = field(default_factory=set)
 
+    _direntry: Optional[os.DirEntry] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _stat: Optional[os.stat_result] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name == "path":
+            # the cached file information belongs to the previous path
+            super().__setattr__("_direntry", None)
+            super().__setattr__("_stat", None)
+        super().__setattr__(name, value)
+
+    @classmethod
+    def from_direntry(cls, entry: os.DirEntry, **kwargs) -> Resource:
+        """
+        Creates a resource from a `os.DirEntry` (as returned by `os.scandir`) so the
+        file type is known without an additional syscall.
+        """
+        res = cls(path=Path(entry.path), **kwargs)
+        res._direntry = entry
+        return res
+
     def relative_path(self) -> Optional[Path]:
         if self.basedir is None:
             return self.path
@@ -50,16 +89,8 @@ class Resource:
             # path is not relative to basedir
             return None
 
-    def dict(self):
-        return dict(
-            path=self.path,
-            basedir=self.basedir,
-            location=self.basedir,
-            relative_path=self.relative_path(),
-            rule=self.rule.name if self.rule else None,
-            rule_nr=self.rule_nr,
-            **self.vars,
-        )
+    def dict(self) -> ResourceVars:
+        return ResourceVars(self)
 
     def deep_merge(self, key: str, data: Dict) -> None:
         """
@@ -68,23 +99,85 @@ class Resource:
         prev = self.vars.get(key, dict())
         self.vars[key] = deep_merge(prev, data)
 
-    # TODO: Caching for `is_file` and `is_dir`
-    # TODO: provide a `from_direntry` constructor to speed things up
+    def stat(self) -> os.stat_result:
+        """
+        The (cached) stat result of the path.
+        """
+        if self.path is None:
+            raise ValueError("No path given")
+        if self._stat is None:
+            # We don't use `DirEntry.stat()` here, as the entry may be shared between
+            # rules and the file might have changed in the meantime.
+            self._stat = self.path.stat()
+        return self._stat
+
     def is_file(self) -> bool:
         if self.path is None:
             raise ValueError("No path given")
-        return self.path.is_file()
+        if self._direntry is not None:
+            return self._direntry.is_file()
+        try:
+            return S_ISREG(self.stat().st_mode)
+        except OSError:
+            return False
 
     def is_dir(self) -> bool:
         if self.path is None:
             raise ValueError("No path given")
-        return self.path.is_dir()
+        if self._direntry is not None:
+            return self._direntry.is_dir()
+        try:
+            return S_ISDIR(self.stat().st_mode)
+        except OSError:
+            return False
 
     def is_empty(self) -> bool:
         if self.path is None:
             raise ValueError("No path given")
         if self.is_file():
-            return self.path.stat().st_size == 0
+            return self.stat().st_size == 0
         elif self.is_dir():
             return not any(self.path.iterdir())
         raise ValueError("Unknown file type")
+
+
+class ResourceVars(Mapping[str, Any]):
+    """
+    The template variables of a resource.
+
+    Derived values like `relative_path` are computed only if a template uses them.
+    """
+
+    __slots__ = ("_res",)
+
+    GETTERS: ClassVar[Dict[str, Callable[[Resource], Any]]] = {
+        "path": lambda res: res.path,
+        "basedir": lambda res: res.basedir,
+        "location": lambda res: res.basedir,
+        "relative_path": lambda res: res.relative_path(),
+        "rule": lambda res: res.rule.name if res.rule else None,
+        "rule_nr": lambda res: res.rule_nr,
+    }
+
+    def __init__(self, res: Resource):
+        self._res = res
+
+    def __getitem__(self, key: str) -> Any:
+        getter = self.GETTERS.get(key)
+        if getter is not None:
+            return getter(self._res)
+        return self._res.vars[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.GETTERS or key in self._res.vars
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.GETTERS
+        yield from (key for key in self._res.vars if key not in self.GETTERS)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def copy(self) -> Dict[str, Any]:
+        # jinja copies the variables when it rewrites the traceback of a template error
+        return dict(self)
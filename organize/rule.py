@@ -1,22 +1,40 @@
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from itertools import islice
 from pathlib import Path
-from typing import Dict, Iterable, List, Literal, Optional, Set
+from typing import (
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Set,
+    Tuple,
+)
 
 from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 
 from organize.logger import logger
 
 from .action import Action
-from .filter import All, Any, Filter, HasFilterPipeline, Not
+from .cache import DirectoryJournal
+from .filesystem import active_filesystem
+from .filter import All, Any, Filter, HasFilterPipeline, HasPrefetch, Not, cost_order
 from .location import Location
-from .output import Output
+from .output import BufferedOutput, ErrorCountingOutput, Output
 from .registry import action_by_name, filter_by_name
 from .resource import Resource
 from .template import render
-from .utils import ReportSummary
+from .utils import ReportSummary, fingerprint
 from .validators import FlatList, flatten
-from .walker import Walker
+from .walker import ScanCache, SkipPathes, Walker
 
 FilterMode = Literal["all", "any", "none"]
+FilterOrder = Literal["config", "cost"]
 
 
 def action_from_dict(d: Dict) -> Action:
@@ -91,6 +109,122 @@ def filter_pipeline(
     return collection.pipeline(res, output=output)
 
 
+def prefetch_pipeline(
+    filters: Iterable[Filter],
+    resources: Iterable[Resource],
+    before_prefetch: Optional[Callable[[], None]] = None,
+) -> Iterator[Resource]:
+    """
+    Reads resources ahead in windows so filters supporting it can prefetch the data
+    of the whole window at once.
+
+    `before_prefetch` is called before the data of the next window is prefetched.
+    """
+    prefetchers = [
+        x for x in filters if isinstance(x, HasPrefetch) and x.prefetch_size > 0
+    ]
+    if not prefetchers:
+        yield from resources
+        return
+
+    size = max(x.prefetch_size for x in prefetchers)
+    it = iter(resources)
+    while window := list(islice(it, size)):
+        if before_prefetch is not None:
+            before_prefetch()
+        for prefetcher in prefetchers:
+            prefetcher.prefetch(window)
+        yield from window
+
+
+def matching_resources(
+    filters: Iterable[Filter],
+    filter_mode: FilterMode,
+    resources: Iterable[Resource],
+    output: Output,
+    skip_pathes: SkipPathes,
+) -> Iterator[Resource]:
+    """
+    Yields the resources passing the filter pipeline.
+
+    `skip_pathes` may be updated while iterating.
+    """
+    for res in resources:
+        if res.path in skip_pathes:
+            continue
+        if filter_pipeline(
+            filters=filters,
+            filter_mode=filter_mode,
+            res=res,
+            output=output,
+        ):
+            yield res
+
+
+def matching_resources_parallel(
+    filters: Iterable[Filter],
+    filter_mode: FilterMode,
+    resources: Iterable[Resource],
+    output: Output,
+    skip_pathes: SkipPathes,
+    jobs: int,
+) -> Iterator[Resource]:
+    """
+    Like `matching_resources`, but runs the filter pipeline for multiple resources in
+    parallel worker threads.
+
+    The resources are yielded in walk order and the filter messages of each resource
+    are passed on to `output` right before the resource is yielded, so the output is
+    the same as in serial mode.
+
+    The data prefetched for a window replaces the data of the previous window, so
+    the workers of the previous window are finished first.
+    """
+    pending: Deque[Tuple[Optional[Path], Resource, BufferedOutput, Future]] = deque()
+
+    def finish_pending() -> None:
+        wait([future for *_, future in pending])
+
+    it = iter(
+        prefetch_pipeline(
+            filters=filters,
+            resources=resources,
+            before_prefetch=finish_pending,
+        )
+    )
+
+    with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="organize") as pool:
+
+        def submit(res: Resource) -> None:
+            buffer = BufferedOutput()
+            future = pool.submit(
+                filter_pipeline,
+                filters=filters,
+                filter_mode=filter_mode,
+                res=res,
+                output=buffer,
+            )
+            pending.append((res.path, res, buffer, future))
+
+        # keep the workers busy by filtering some resources ahead
+        for res in islice(it, 2 * jobs):
+            submit(res)
+
+        while pending:
+            # may prefetch the next window, so the current resource is still pending
+            next_res = next(it, None)
+            path, res, buffer, future = pending.popleft()
+            if next_res is not None:
+                submit(next_res)
+
+            result = future.result()
+            if path in skip_pathes:
+                continue
+            buffer.replay(output)
+            if result:
+                yield res
+
+
 def action_pipeline(
     actions: Iterable[Action],
     res: Resource,
@@ -114,6 +248,7 @@ class Rule(BaseModel):
     tags: Set[str] = Field(default_factory=set)
     filters: List[Filter] = Field(default_factory=list)
     filter_mode: FilterMode = "all"
+    filter_order: FilterOrder = "config"
     actions: List[Action] = Field(..., min_length=1)
 
     model_config = ConfigDict(
@@ -210,44 +345,173 @@ class Rule(BaseModel):
 
         return self
 
-    def walk(self, rule_nr: int = 0):
-        for location in self.locations:
-            # instantiate the filesystem walker
-            exclude_files = location.system_exclude_files | location.exclude_files
-            exclude_dirs = location.system_exclude_dirs | location.exclude_dirs
-            if location.max_depth == "inherit":
-                max_depth = None if self.subfolders else 0
-            else:
-                max_depth = location.max_depth
-
-            walker = Walker(
-                min_depth=location.min_depth,
-                max_depth=max_depth,
-                filter_dirs=location.filter_dirs,
-                filter_files=location.filter,
-                method="breadth",
-                exclude_dirs=exclude_dirs,
-                exclude_files=exclude_files,
-            )
+    def close(self) -> None:
+        """
+        Releases resources held by filters and actions (like worker processes).
+        """
+        for x in (*self.filters, *self.actions):
+            close = getattr(x, "close", None)
+            if close is not None:
+                close()
 
-            # whether to walk dirs or files
-            _walk_funcs = {
-                "files": walker.files,
-                "dirs": walker.dirs,
-            }
+    def flush(self) -> None:
+        """
+        Saves the pending state of filters (like the duplicate index).
+        """
+        for x in self.filters:
+            flush = getattr(x, "flush", None)
+            if flush is not None:
+                flush()
+
+    def walker(self, location: Location) -> Walker:
+        # instantiate the filesystem walker
+        exclude_files = location.system_exclude_files | location.exclude_files
+        exclude_dirs = location.system_exclude_dirs | location.exclude_dirs
+        if location.max_depth == "inherit":
+            max_depth = None if self.subfolders else 0
+        else:
+            max_depth = location.max_depth
+
+        return Walker(
+            min_depth=location.min_depth,
+            max_depth=max_depth,
+            filter_dirs=location.filter_dirs,
+            filter_files=location.filter,
+            method="breadth",
+            exclude_dirs=exclude_dirs,
+            exclude_files=exclude_files,
+            workers=location.scan_workers,
+            sort=location.sort,
+            stream=location.stream,
+        )
+
+    def walk(
+        self,
+        rule_nr: int = 0,
+        skip: Optional[SkipPathes] = None,
+        scan_cache: Optional[ScanCache] = None,
+        journal: Optional[DirectoryJournal] = None,
+    ):
+        # in simulation the pathes removed by earlier actions are skipped
+        fs = active_filesystem()
+        for location in self.locations:
+            walker = self.walker(location)
             for loc_path in location.path:
                 expanded_path = render(loc_path)
-                for path in _walk_funcs[self.targets](expanded_path):
+                # if path is a single file we emit just the path itself
+                if self.targets == "files" and os.path.isfile(expanded_path):
+                    if fs is not None and fs.is_removed(expanded_path):
+                        continue
                     yield Resource(
-                        path=Path(path),
+                        path=Path(expanded_path),
+                        basedir=Path(expanded_path),
+                        rule=self,
+                        rule_nr=rule_nr,
+                    )
+                    continue
+                # otherwise we walk the given folder
+                journal_view = None
+                if journal is not None and location.incremental:
+                    # the recorded states are only valid for the same rule settings
+                    journal_view = journal.view(
+                        fingerprint(
+                            os.path.abspath(expanded_path),
+                            location,
+                            self.targets,
+                            self.subfolders,
+                            self.filters,
+                            self.filter_mode,
+                            self.actions,
+                        )
+                    )
+                for entry in walker.walk(
+                    expanded_path,
+                    files=self.targets == "files",
+                    dirs=self.targets == "dirs",
+                    skip=skip,
+                    scan_cache=scan_cache,
+                    journal=journal_view,
+                ):
+                    if fs is not None and fs.is_removed(entry.path):
+                        continue
+                    yield Resource.from_direntry(
+                        entry,
                         basedir=Path(expanded_path),
                         rule=self,
                         rule_nr=rule_nr,
                     )
 
+    def changed_resources(
+        self,
+        paths: Iterable[Path],
+        rule_nr: int = 0,
+        skip: Optional[SkipPathes] = None,
+    ) -> Iterator[Resource]:
+        """
+        Yields the resources for the given changed paths (e.g. from the watch mode)
+        which walking the locations of this rule would yield.
+        """
+        for path in paths:
+            if skip and path in skip:
+                continue
+            if path.is_symlink() or not path.exists():
+                continue
+            is_dir = path.is_dir()
+            if is_dir != (self.targets == "dirs"):
+                continue
+            for location in self.locations:
+                walker = self.walker(location)
+                basedir = next(
+                    (
+                        Path(x)
+                        for x in (render(loc_path) for loc_path in location.path)
+                        if (not is_dir and os.path.abspath(x) == os.path.abspath(path))
+                        or walker.yields(x, str(path), is_dir=is_dir)
+                    ),
+                    None,
+                )
+                if basedir is not None:
+                    # same path form as in `walk`, relative locations stay relative
+                    yield Resource(
+                        path=basedir / os.path.relpath(path, basedir),
+                        basedir=basedir,
+                        rule=self,
+                        rule_nr=rule_nr,
+                    )
+                    break
+
+    def ordered_filters(self) -> List[Filter]:
+        """
+        The filters in the order they are evaluated.
+        """
+        # all filters are evaluated in `any` mode, so the order makes no difference
+        if self.filter_order == "cost" and self.filter_mode != "any":
+            return cost_order(self.filters)
+        return list(self.filters)
+
+    def supports_parallel(self) -> bool:
+        """
+        Whether the filters of this rule can evaluate resources in parallel.
+        """
+        return all(x.filter_config.parallel for x in self.filters)
+
     def execute(
-        self, *, simulate: bool, output: Output, rule_nr: int = 0
+        self,
+        *,
+        simulate: bool,
+        output: Output,
+        rule_nr: int = 0,
+        jobs: int = 1,
+        scan_cache: Optional[ScanCache] = None,
+        changes: Optional[Iterable[Path]] = None,
+        skip_pathes: Optional[SkipPathes] = None,
     ) -> ReportSummary:
+        """
+        Runs the rule.
+
+        If `changes` are given, only these pathes are handled instead of walking the
+        locations. The targets of the actions are added to `skip_pathes`.
+        """
         if not self.enabled:
             return ReportSummary()
 
@@ -277,17 +541,46 @@ class Rule(BaseModel):
 
         # normal mode
         summary = ReportSummary()
-        skip_pathes: Set[Path] = set()
-        for res in self.walk(rule_nr=rule_nr):
-            if res.path in skip_pathes:
-                continue
-            result = filter_pipeline(
-                filters=self.filters,
+        # targets of the actions are skipped for the rest of this rule
+        if skip_pathes is None:
+            skip_pathes = SkipPathes()
+        journal = None
+        counting_output: Optional[ErrorCountingOutput] = None
+        if changes is not None:
+            walk = self.changed_resources(changes, rule_nr=rule_nr, skip=skip_pathes)
+        else:
+            if any(location.incremental for location in self.locations):
+                journal = DirectoryJournal()
+                # filter errors don't count as failed files, but need a retry, too
+                output = counting_output = ErrorCountingOutput(output)
+            walk = self.walk(
+                rule_nr=rule_nr,
+                skip=skip_pathes,
+                scan_cache=scan_cache,
+                journal=journal,
+            )
+        filters = self.ordered_filters()
+        # Only the filters run in parallel. Actions are always executed one after
+        # another in walk order, so actions touching the same destination never race.
+        if jobs > 1 and self.supports_parallel():
+            matches = matching_resources_parallel(
+                filters=filters,
                 filter_mode=self.filter_mode,
-                res=res,
+                resources=walk,
                 output=output,
+                skip_pathes=skip_pathes,
+                jobs=jobs,
             )
-            if result:
+        else:
+            matches = matching_resources(
+                filters=filters,
+                filter_mode=self.filter_mode,
+                resources=prefetch_pipeline(filters=filters, resources=walk),
+                output=output,
+                skip_pathes=skip_pathes,
+            )
+        try:
+            for res in matches:
                 current_action = None
                 try:
                     for current_action in action_pipeline(
@@ -297,7 +590,7 @@ class Rule(BaseModel):
                         output=output,
                     ):
                         pass
-                    skip_pathes = skip_pathes.union(res.walker_skip_pathes)
+                    skip_pathes.update(res.walker_skip_pathes)
                     summary.success += 1
                 except Exception as e:
                     output.msg(
@@ -308,4 +601,16 @@ class Rule(BaseModel):
                     )
                     logger.exception(e)
                     summary.errors += 1
+            # Only remember the walked directories if all files were handled, so
+            # failed files are retried in the next run.
+            if (
+                journal is not None
+                and not simulate
+                and not summary.errors
+                and not (counting_output is not None and counting_output.errors)
+            ):
+                journal.commit()
+        finally:
+            if journal is not None:
+                journal.close()
         return summary
@@ -1,6 +1,8 @@
 import os
+from collections import ChainMap, Counter
 from datetime import date, datetime
-from typing import Union
+from functools import lru_cache
+from typing import Any, Dict, Mapping, Optional, Union
 
 import jinja2
 
@@ -22,7 +24,34 @@ def finalize_placeholder(x):
     return x
 
 
-Template = jinja2.Environment(
+def constant_text(source: str) -> Optional[str]:
+    """
+    Returns the rendered text of templates without any placeholders, blocks or
+    comments, else None.
+    """
+    # all jinja syntax starts with "{" in our environment. Templates with "\r" are left
+    # to jinja, as it normalizes the newlines.
+    if "{" in source or "\r" in source:
+        return None
+    # jinja strips a single trailing newline
+    if source.endswith("\n"):
+        return source[:-1]
+    return source
+
+
+class TemplateEnvironment(jinja2.Environment):
+    def from_string(self, source, globals=None, template_class=None):
+        template = super().from_string(
+            source, globals=globals, template_class=template_class
+        )
+        # remember constant templates, so `render` can skip jinja
+        template.constant_text = (
+            constant_text(source) if isinstance(source, str) else None
+        )
+        return template
+
+
+Template = TemplateEnvironment(
     variable_start_string="{",
     variable_end_string="}",
     autoescape=False,
@@ -30,15 +59,66 @@ Template = jinja2.Environment(
     undefined=jinja2.StrictUndefined,
 )
 
+# number of compiled templates kept by `compile_template`
+TEMPLATE_CACHE_SIZE = 1024
+
+# counters for diagnostics, see `render_stats`
+_stats: Counter = Counter()
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compile_template(source: str) -> jinja2.Template:
+    """
+    Compiles a template. The compiled templates are shared by the whole process.
+    """
+    return Template.from_string(source)
+
+
+def render_stats() -> Dict[str, int]:
+    """
+    Counters of the `render` calls and the compiled template cache.
+    """
+    info = compile_template.cache_info()
+    return dict(
+        renders=_stats["renders"],
+        constant=_stats["constant"],
+        compile_hits=info.hits,
+        compile_misses=info.misses,
+        cached_templates=info.currsize,
+    )
+
+
+def _render_jinja(template: jinja2.Template, args: Mapping[str, Any]) -> str:
+    # Like `template.render`, but the variables are looked up in `args` only when the
+    # template uses them instead of copying them into a new dict.
+    ctx = template.new_context(
+        ChainMap(args, BASIC_VARS, template.globals),  # type: ignore
+        shared=True,
+    )
+    try:
+        return template.environment.concat(template.root_render_func(ctx))  # type: ignore
+    except Exception:
+        template.environment.handle_exception()
+
 
-def render(template: Union[str, jinja2.Template], args=None) -> str:
+def render(
+    template: Union[str, jinja2.Template],
+    args: Optional[Mapping[str, Any]] = None,
+) -> str:
     if args is None:
         args = dict()
+    _stats["renders"] += 1
+    if isinstance(template, jinja2.Template):
+        text = getattr(template, "constant_text", None)
+    else:
+        text = constant_text(template)
+        if text is None:
+            template = compile_template(template)
     try:
-        if isinstance(template, jinja2.Template):
-            text = template.render(**args, **BASIC_VARS)
+        if text is None:
+            text = _render_jinja(template, args)  # type: ignore
         else:
-            text = Template.from_string(template).render(**args, **BASIC_VARS)
+            _stats["constant"] += 1
     except jinja2.UndefinedError as e:
         msg = f"Missing value for template: {e}. Maybe you forgot a filter?"
         raise ValueError(msg) from e
@@ -1,12 +1,17 @@
+import dataclasses
 import fnmatch
+import hashlib
+import json
 import os
 import shutil
+import textwrap
 import unicodedata
 from copy import deepcopy
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Literal, Union
+from typing import Any, Callable, Dict, Iterable, Literal, Tuple, Union
 
+from pydantic import BaseModel
 from rich.markup import escape as rich_escape
 
 ENV_ORGANIZE_NORMALIZE_UNICODE = os.environ.get("ORGANIZE_NORMALIZE_UNICODE", "1")
@@ -36,6 +41,12 @@ class ReportSummary:
             errors=self.errors + other.errors,
         )
 
+    def __iadd__(self, other: "ReportSummary") -> "ReportSummary":
+        # in place, so a summary handed out by `Config._session` stays up to date
+        self.success += other.success
+        self.errors += other.errors
+        return self
+
 
 class ChangeDetector:
     def __init__(self):
@@ -56,6 +67,34 @@ class ChangeDetector:
         self._ready = False
 
 
+def _canonical(value: Any) -> Any:
+    # a JSON compatible representation which does not depend on the hash seed
+    if isinstance(value, BaseModel):
+        fields = {k: getattr(value, k) for k in type(value).model_fields}
+        return [type(value).__name__, _canonical(fields)]
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        fields = {f.name: getattr(value, f.name) for f in dataclasses.fields(value)}
+        return [type(value).__name__, _canonical(fields)]
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(x) for x in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted((_canonical(x) for x in value), key=json.dumps)
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return repr(value)
+
+
+def fingerprint(*values: Any) -> str:
+    """
+    Returns a hash of the given values (e.g. filters and actions), which stays the
+    same across runs as long as the values are equal.
+    """
+    data = json.dumps(_canonical(values), sort_keys=True)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
 def has_executable(name: str) -> bool:
     return shutil.which(name) is not None
 
@@ -88,3 +127,46 @@ def deep_merge_inplace(base: dict, updates: dict) -> None:
             deep_merge_inplace(av, bv)
         else:
             base[bk] = bv
+
+
+def compile_usercode(code: str, argnames: Iterable[str] = ()) -> Callable:
+    """
+    Compiles the given python code into the body of a function accepting `print` and
+    the given argument names.
+
+    Raises:
+        ValueError if the code contains a syntax error.
+    """
+    args = ", ".join(("print", *argnames))
+    source = f"def __userfunc({args}):\n" + textwrap.indent(code, "    ")
+    try:
+        compiled = compile(source, "<python>", "exec")
+    except SyntaxError as e:
+        # the line number is off by one because of the function definition
+        lineno = (e.lineno or 1) - 1
+        raise ValueError(f"Syntax error in python code (line {lineno}): {e.msg}") from e
+    namespace: Dict[str, Any] = {}
+    exec(compiled, namespace)
+    return namespace["__userfunc"]
+
+
+class UserCode:
+    """
+    Python code given in the config.
+
+    The code is compiled into a function which takes the resource variables as
+    arguments. As the available variables are the same for every resource of a rule
+    the function is compiled only once per distinct set of variable names.
+    """
+
+    def __init__(self, code: str):
+        self.code = code
+        self._funcs: Dict[Tuple[str, ...], Callable] = {}
+
+    def __call__(self, print: Callable, kwargs: Dict[str, Any]) -> Any:
+        argnames = tuple(kwargs.keys())
+        func = self._funcs.get(argnames)
+        if func is None:
+            func = compile_usercode(self.code, argnames)
+            self._funcs[argnames] = func
+        return func(print, **kwargs)
@@ -1,29 +1,122 @@
 import os
-from fnmatch import fnmatch
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from fnmatch import fnmatch, translate
+from functools import cached_property
 from pathlib import Path
-from typing import Iterable, Iterator, List, Literal, NamedTuple, Optional, Set
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 from natsort import os_sorted
 from pydantic import Field
 from pydantic.dataclasses import dataclass
 
+from .cache import JournalView
+
+# fnmatch matches case-insensitive on Windows
+_normcase: Optional[Callable[[str], str]] = (
+    os.path.normcase if os.name == "nt" else None
+)
+
 
 def pattern_match(name: str, patterns: Iterable[str]) -> bool:
     return any(fnmatch(name, pat) for pat in patterns)
 
 
+class PatternMatcher:
+    """
+    Matches names against a set of fnmatch patterns, like `pattern_match`.
+
+    The patterns are compiled once: names without wildcards are looked up in a set,
+    all other patterns are combined into a single regular expression.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self._names: Set[str] = set()
+        wildcards: List[str] = []
+        for pat in patterns:
+            if _normcase is not None:
+                pat = _normcase(pat)
+            if any(c in pat for c in "*?["):
+                wildcards.append(translate(pat))
+            else:
+                self._names.add(pat)
+        self._regex = re.compile("|".join(wildcards)) if wildcards else None
+
+    def __call__(self, name: str) -> bool:
+        if _normcase is not None:
+            name = _normcase(name)
+        if name in self._names:
+            return True
+        return self._regex is not None and self._regex.match(name) is not None
+
+
+class SkipPathes:
+    """
+    A set of pathes the walker should neither yield nor descend into.
+
+    Actions register their targets here so that moved / copied files are not handled
+    twice within the same rule. The set is updated in place while walking.
+    """
+
+    def __init__(self, pathes: Iterable[Union[str, Path]] = ()):
+        self._pathes: Set[str] = set()
+        self.update(pathes)
+
+    @staticmethod
+    def _key(path: Union[str, Path]) -> str:
+        return os.path.normpath(path)
+
+    def add(self, path: Union[str, Path]) -> None:
+        self._pathes.add(self._key(path))
+
+    def update(self, pathes: Iterable[Union[str, Path]]) -> None:
+        for path in pathes:
+            self.add(path)
+
+    def __contains__(self, path: object) -> bool:
+        if not isinstance(path, (str, Path)) or not self._pathes:
+            return False
+        return self._key(path) in self._pathes
+
+    def __len__(self) -> int:
+        return len(self._pathes)
+
+
 class ScandirResult(NamedTuple):
     dirs: List[os.DirEntry]
     nondirs: List[os.DirEntry]
 
 
-def scandir(top: str, collectfiles: bool = True) -> ScandirResult:
-    result = ScandirResult(dirs=[], nondirs=[])
+# The order of the directory entries. "natural" sorts like the file manager of the OS,
+# "plain" sorts by code point and "none" keeps the order of the filesystem.
+Sort = Literal["natural", "plain", "none"]
+
+
+def iter_scandir(top: str) -> Iterator[Tuple[os.DirEntry, bool]]:
+    """
+    Yields the entries of `top` and whether they are directories in the order the
+    filesystem returns them. Symlinks are skipped.
+    """
     try:
         # build iterator if we have the permissions to this folder
         scandir_it = os.scandir(top)
     except OSError:
-        return result
+        return
 
     with scandir_it:
         while True:
@@ -33,7 +126,7 @@ def scandir(top: str, collectfiles: bool = True) -> ScandirResult:
                 except StopIteration:
                     break
             except OSError:
-                return result
+                return
 
             try:
                 is_symlink = entry.is_symlink()
@@ -54,19 +147,151 @@ def scandir(top: str, collectfiles: bool = True) -> ScandirResult:
                 # a directory, same behaviour than os.path.isdir().
                 is_dir = False
 
-            if is_dir:
-                result.dirs.append(entry)
-            elif collectfiles:
-                result.nondirs.append(entry)
+            yield entry, is_dir
+
+
+def sort_entries(entries: List[os.DirEntry], sort: Sort) -> List[os.DirEntry]:
+    if sort == "natural":
+        return os_sorted(entries, key=lambda x: x.name)
+    if sort == "plain":
+        return sorted(entries, key=lambda x: x.name)
+    return entries
+
+
+def scandir(
+    top: str,
+    collectfiles: bool = True,
+    sort: Sort = "natural",
+) -> ScandirResult:
+    result = ScandirResult(dirs=[], nondirs=[])
+    for entry, is_dir in iter_scandir(top):
+        if is_dir:
+            result.dirs.append(entry)
+        elif collectfiles:
+            result.nondirs.append(entry)
     return ScandirResult(
-        dirs=os_sorted(result.dirs, key=lambda x: x.name),
-        nondirs=os_sorted(result.nondirs, key=lambda x: x.name),
+        dirs=sort_entries(result.dirs, sort),
+        nondirs=sort_entries(result.nondirs, sort),
     )
 
 
+class ScanCache:
+    """
+    Directory listings shared by all rules of a run, so a location used by multiple
+    rules is listed only once.
+
+    A cached listing is reused as long as the modification time of the directory is
+    unchanged. This way files moved around by previous rules (or anything else) are
+    picked up.
+    """
+
+    # Listings of directories modified shortly before they were listed are not
+    # cached, as a later change might not be detectable with coarse mtime
+    # resolutions.
+    RACY_NS = 2_000_000_000
+
+    def __init__(self, max_entries: int = 1_000_000):
+        self.max_entries = max_entries
+        self._listings: OrderedDict[Tuple[str, Sort], Tuple[int, ScandirResult]] = (
+            OrderedDict()
+        )
+        self._entries = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def scandir(self, top: str, sort: Sort = "natural") -> ScandirResult:
+        try:
+            mtime_ns = os.stat(top).st_mtime_ns
+        except OSError:
+            return scandir(top, sort=sort)
+
+        key = (top, sort)
+        with self._lock:
+            cached = self._listings.get(key)
+            if cached is not None and cached[0] == mtime_ns:
+                self._listings.move_to_end(key)
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+
+        listed_at = time.time_ns()
+        result = scandir(top, sort=sort)
+        with self._lock:
+            self._remove(key)
+            if listed_at - mtime_ns > self.RACY_NS:
+                self._listings[key] = (mtime_ns, result)
+                self._entries += len(result.dirs) + len(result.nondirs)
+                while self._entries > self.max_entries and self._listings:
+                    self._remove(next(iter(self._listings)))
+        return result
+
+    def _remove(self, key: Tuple[str, Sort]) -> None:
+        cached = self._listings.pop(key, None)
+        if cached is not None:
+            self._entries -= len(cached[1].dirs) + len(cached[1].nondirs)
+
+
+class DirLister:
+    """
+    Lists directories for the walker.
+
+    With `workers` > 0 the listings of the directories the walker visits next are
+    read ahead in a thread pool. This hides the latency of network filesystems.
+    """
+
+    def __init__(
+        self,
+        collectfiles: bool = True,
+        scan_cache: Optional[ScanCache] = None,
+        workers: int = 0,
+        sort: Sort = "natural",
+    ):
+        self.collectfiles = collectfiles
+        self.scan_cache = scan_cache
+        self.sort = sort
+        self._pool = ThreadPoolExecutor(max_workers=workers) if workers > 0 else None
+        self._pending: Dict[str, Future[ScandirResult]] = {}
+
+    def _scandir(self, top: str) -> ScandirResult:
+        if self.scan_cache is not None:
+            return self.scan_cache.scandir(top, sort=self.sort)
+        return scandir(top, collectfiles=self.collectfiles, sort=self.sort)
+
+    def prefetch(self, pathes: Iterable[str]) -> None:
+        if self._pool is None:
+            return
+        for path in pathes:
+            if path not in self._pending:
+                self._pending[path] = self._pool.submit(self._scandir, path)
+
+    def listing(self, top: str) -> ScandirResult:
+        future = self._pending.pop(top, None)
+        if future is not None:
+            return future.result()
+        return self._scandir(top)
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pending.clear()
+
+
 class DirActions(NamedTuple):
     to_yield: List[os.DirEntry]
-    to_walk: List[os.DirEntry]
+    to_walk: List[str]
+
+
+class _Frame:
+    # a directory on the stack of the depth-first walk
+    __slots__ = ("path", "lvl", "listing", "actions", "next_child")
+
+    def __init__(self, path: str, lvl: int):
+        self.path = path
+        self.lvl = lvl
+        self.listing: Optional[ScandirResult] = None
+        self.actions: Optional[DirActions] = None
+        self.next_child = 0
 
 
 @dataclass(frozen=True)
@@ -78,77 +303,253 @@ class Walker:
     filter_files: Optional[List[str]] = None
     exclude_dirs: Set[str] = Field(default_factory=set)
     exclude_files: Set[str] = Field(default_factory=set)
+    workers: int = Field(default=0, ge=0)
+    sort: Sort = "natural"
+    stream: bool = False
 
-    def _should_yield_file(self, entry: os.DirEntry, lvl: int) -> bool:
+    # the compiled patterns. The dataclass is frozen, `cached_property` stores the
+    # result in the instance dict directly.
+    @cached_property
+    def _exclude_files(self) -> PatternMatcher:
+        return PatternMatcher(self.exclude_files)
+
+    @cached_property
+    def _exclude_dirs(self) -> PatternMatcher:
+        return PatternMatcher(self.exclude_dirs)
+
+    @cached_property
+    def _filter_files(self) -> Optional[PatternMatcher]:
+        if self.filter_files is None:
+            return None
+        return PatternMatcher(self.filter_files)
+
+    @cached_property
+    def _filter_dirs(self) -> Optional[PatternMatcher]:
+        if self.filter_dirs is None:
+            return None
+        return PatternMatcher(self.filter_dirs)
+
+    def _file_matches(self, name: str) -> bool:
+        return not self._exclude_files(name) and (
+            self._filter_files is None or self._filter_files(name)
+        )
+
+    def _dir_matches(self, name: str) -> bool:
+        return not self._exclude_dirs(name) and (
+            self._filter_dirs is None or self._filter_dirs(name)
+        )
+
+    def _should_yield_file(
+        self, entry: os.DirEntry, lvl: int, skip: Optional[SkipPathes]
+    ) -> bool:
         return (
             lvl >= self.min_depth
-            and not pattern_match(entry.name, self.exclude_files)
-            and (
-                self.filter_files is None
-                or pattern_match(entry.name, self.filter_files)
-            )
+            and not (skip and entry.path in skip)
+            and self._file_matches(entry.name)
         )
 
+    def yields(self, top: str, path: str, is_dir: bool) -> bool:
+        """
+        Whether walking `top` would yield `path`, without listing any directories.
+        """
+        rel = os.path.relpath(os.path.abspath(path), os.path.abspath(top))
+        if rel == os.curdir or rel == os.pardir or rel.startswith(os.pardir + os.sep):
+            return False
+        *parents, name = rel.split(os.sep)
+        lvl = len(parents)
+        if lvl < self.min_depth:
+            return False
+        if self.max_depth is not None and lvl > self.max_depth:
+            return False
+        if not all(self._dir_matches(parent) for parent in parents):
+            return False
+        return self._dir_matches(name) if is_dir else self._file_matches(name)
+
+    def descends(self, top: str, path: str) -> bool:
+        """
+        Whether walking `top` would list the contents of the directory `path`.
+        """
+        rel = os.path.relpath(os.path.abspath(path), os.path.abspath(top))
+        if rel == os.curdir:
+            return True
+        if rel == os.pardir or rel.startswith(os.pardir + os.sep):
+            return False
+        parts = rel.split(os.sep)
+        if self.max_depth is not None and len(parts) - 1 >= self.max_depth:
+            return False
+        return all(self._dir_matches(part) for part in parts)
+
     def _dir_actions(self, entries: Iterable[os.DirEntry], lvl: int) -> DirActions:
         result = DirActions(to_yield=[], to_walk=[])
         for entry in entries:
-            if not pattern_match(entry.name, self.exclude_dirs) and (
-                self.filter_dirs is None or pattern_match(entry.name, self.filter_dirs)
-            ):
+            if self._dir_matches(entry.name):
                 if self.max_depth is None or lvl < self.max_depth:
-                    result.to_walk.append(entry)
+                    result.to_walk.append(entry.path)
                 if lvl >= self.min_depth:
                     result.to_yield.append(entry)
         return result
 
+    def _entries(
+        self,
+        listing: ScandirResult,
+        actions: DirActions,
+        files: bool,
+        dirs: bool,
+        lvl: int,
+        skip: Optional[SkipPathes],
+    ) -> Iterator[os.DirEntry]:
+        if files:
+            for entry in listing.nondirs:
+                if self._should_yield_file(entry=entry, lvl=lvl, skip=skip):
+                    yield entry
+        if dirs:
+            for entry in actions.to_yield:
+                if not (skip and entry.path in skip):
+                    yield entry
+
+    def _prefetch_children(
+        self, lister: DirLister, frame: _Frame, skip: Optional[SkipPathes]
+    ) -> None:
+        # read ahead the next sub-directories of the frame
+        if not self.workers or frame.actions is None:
+            return
+        upcoming = frame.actions.to_walk[
+            frame.next_child : frame.next_child + 2 * self.workers
+        ]
+        lister.prefetch(x for x in upcoming if not (skip and x in skip))
+
     def walk(
         self,
         top: str,
         files: bool = True,
         dirs: bool = True,
         lvl: int = 0,
+        skip: Optional[SkipPathes] = None,
+        scan_cache: Optional[ScanCache] = None,
+        journal: Optional[JournalView] = None,
     ) -> Iterator[os.DirEntry]:
+        """
+        Walks the directory tree starting at `top`.
+
+        "breadth" yields the entries of a directory before descending into its
+        subdirectories, "depth" yields them afterwards. Entries are yielded in the
+        order given by `sort`. With `stream` and "breadth" the files are yielded
+        unsorted while the directory is still being read.
+
+        Pathes in `skip` are neither yielded nor descended into. `skip` may change
+        while walking. Directory listings are taken from `scan_cache` if given.
+
+        With a `journal` the entries of directories which did not change since the
+        last run are not yielded again, only their subdirectories are walked.
+        """
         if not files and not dirs:
             return
+        if self.method not in ("breadth", "depth"):
+            raise ValueError(f'Unknown method "{self.method}"')
 
-        # list all dirs and nondirs of the folder
-        result = scandir(top, collectfiles=files)
+        streaming = self.stream and self.method == "breadth"
+        lister = DirLister(
+            collectfiles=files,
+            # streamed directories are always read fresh and not read ahead
+            scan_cache=None if streaming else scan_cache,
+            workers=0 if streaming else self.workers,
+            sort="none" if self.stream else self.sort,
+        )
+        # The directories are kept on an explicit stack instead of recursing, so the
+        # cost per entry does not depend on the depth of the tree.
+        stack = [_Frame(path=top, lvl=lvl)]
+        try:
+            while stack:
+                frame = stack[-1]
+                subdir_names = None
+                if frame.actions is None and journal is not None:
+                    subdir_names = journal.unchanged_subdirs(frame.path)
+                if frame.actions is None and subdir_names is not None:
+                    # the entries were handled in a previous run
+                    frame.listing = ScandirResult(dirs=[], nondirs=[])
+                    frame.actions = DirActions(
+                        to_yield=[],
+                        to_walk=[
+                            os.path.join(frame.path, name)
+                            for name in subdir_names
+                            if self._dir_matches(name)
+                            and (self.max_depth is None or frame.lvl < self.max_depth)
+                        ],
+                    )
+                    self._prefetch_children(lister, frame, skip=skip)
+                elif frame.actions is None:
+                    if streaming:
+                        subdirs = []
+                        for entry, is_dir in iter_scandir(frame.path):
+                            if is_dir:
+                                subdirs.append(entry)
+                            elif files and self._should_yield_file(
+                                entry=entry, lvl=frame.lvl, skip=skip
+                            ):
+                                yield entry
+                        frame.listing = ScandirResult(dirs=subdirs, nondirs=[])
+                    else:
+                        frame.listing = lister.listing(frame.path)
+                    frame.actions = self._dir_actions(frame.listing.dirs, frame.lvl)
+                    if journal is not None:
+                        journal.record(frame.path, [x.name for x in frame.listing.dirs])
+                    self._prefetch_children(lister, frame, skip=skip)
+                    if self.method == "breadth":
+                        yield from self._entries(
+                            frame.listing,
+                            frame.actions,
+                            files=files,
+                            dirs=dirs,
+                            lvl=frame.lvl,
+                            skip=skip,
+                        )
 
-        if self.method == "breadth":
-            # Return entries
-            for entry in result.nondirs:
-                if files and self._should_yield_file(entry=entry, lvl=lvl):
-                    yield entry
-            dir_actions = self._dir_actions(result.dirs, lvl=lvl)
-            if dirs:
-                yield from dir_actions.to_yield
-            # Recurse into sub-directories
-            for entry in dir_actions.to_walk:
-                yield from self.walk(entry.path, files=files, dirs=dirs, lvl=lvl + 1)
-
-        elif self.method == "depth":
-            dir_actions = self._dir_actions(result.dirs, lvl=lvl)
-            # Recurse into sub-directories
-            for entry in dir_actions.to_walk:
-                yield from self.walk(entry.path, files=files, dirs=dirs, lvl=lvl + 1)
-            # Return entries
-            for entry in result.nondirs:
-                if files and self._should_yield_file(entry=entry, lvl=lvl):
-                    yield entry
-            if dirs:
-                yield from dir_actions.to_yield
-        else:
-            raise ValueError(f'Unknown method "{self.method}"')
+                # descend into the next sub-directory
+                if frame.next_child < len(frame.actions.to_walk):
+                    path = frame.actions.to_walk[frame.next_child]
+                    frame.next_child += 1
+                    if not (skip and path in skip):
+                        stack.append(_Frame(path=path, lvl=frame.lvl + 1))
+                        self._prefetch_children(lister, frame, skip=skip)
+                    continue
+
+                stack.pop()
+                if self.method == "depth":
+                    assert frame.listing is not None
+                    yield from self._entries(
+                        frame.listing,
+                        frame.actions,
+                        files=files,
+                        dirs=dirs,
+                        lvl=frame.lvl,
+                        skip=skip,
+                    )
+        finally:
+            lister.close()
 
-    def files(self, path: str) -> Iterator[Path]:
+    def files(
+        self,
+        path: str,
+        skip: Optional[SkipPathes] = None,
+        scan_cache: Optional[ScanCache] = None,
+    ) -> Iterator[Path]:
         # if path is a single file we emit just the path itself
         if os.path.isfile(path):
             yield Path(path)
             return
         # otherwise we walk the given folder
-        for entry in self.walk(path, files=True, dirs=False):
+        for entry in self.walk(
+            path, files=True, dirs=False, skip=skip, scan_cache=scan_cache
+        ):
             yield Path(entry.path)
 
-    def dirs(self, path: str) -> Iterator[Path]:
-        for entry in self.walk(path, files=False, dirs=True):
+    def dirs(
+        self,
+        path: str,
+        skip: Optional[SkipPathes] = None,
+        scan_cache: Optional[ScanCache] = None,
+    ) -> Iterator[Path]:
+        for entry in self.walk(
+            path, files=False, dirs=True, skip=skip, scan_cache=scan_cache
+        ):
             yield Path(entry.path)
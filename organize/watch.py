@@ -0,0 +1,281 @@
+"""
+Watches the locations of the rules for changes (Linux only, uses inotify).
+"""
+
+from __future__ import annotations
+
+import ctypes
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from .logger import logger
+from .rule import Rule
+from .template import render
+from .walker import Walker
+
+# see `man 7 inotify`
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_CLOSE_WRITE
+    | IN_MOVED_TO
+    | IN_MOVED_FROM
+    | IN_CREATE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+    | IN_ONLYDIR
+)
+
+# struct inotify_event { int wd; uint32_t mask; uint32_t cookie; uint32_t len; }
+EVENT_HEADER = struct.Struct("iIII")
+
+# how often a waiting watcher checks whether it should stop
+STOP_POLL_INTERVAL = 0.1
+
+
+class Event(NamedTuple):
+    wd: int
+    mask: int
+    name: str
+
+
+@lru_cache(maxsize=1)
+def _libc():
+    if not sys.platform.startswith("linux"):
+        raise OSError("Watching for changes is only supported on Linux (inotify).")
+    libc = ctypes.CDLL(None, use_errno=True)
+    if not hasattr(libc, "inotify_init1"):
+        raise OSError("This system's libc has no inotify support.")
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
+
+
+def _check(result: int, path: Optional[str] = None) -> int:
+    if result < 0:
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err), path)
+    return result
+
+
+class Inotify:
+    """
+    A minimal inotify binding via ctypes.
+    """
+
+    def __init__(self) -> None:
+        self._libc = _libc()
+        self.fd = _check(self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC))
+        self._poll = select.poll()
+        self._poll.register(self.fd, select.POLLIN)
+
+    def add_watch(self, path: str, mask: int = WATCH_MASK) -> int:
+        return _check(
+            self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask),
+            path=path,
+        )
+
+    def remove_watch(self, wd: int) -> None:
+        # fails if the watch was already removed by the kernel, which is fine.
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self, timeout: Optional[float]) -> List[Event]:
+        """
+        Waits up to `timeout` seconds (forever if None) for events.
+        """
+        if not self._poll.poll(None if timeout is None else timeout * 1000):
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        result = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            result.append(Event(wd=wd, mask=mask, name=os.fsdecode(name)))
+        return result
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class Watcher:
+    """
+    Watches all directories the given rules would walk and collects the changed
+    pathes.
+
+    Attributes:
+        rules (Sequence[Rule]): The rules whose locations are watched.
+    """
+
+    def __init__(self, rules: Sequence[Rule]) -> None:
+        self.inotify = Inotify()
+        self._dirs: Dict[int, str] = {}
+        self._wds: Dict[str, int] = {}
+        # the walked location folders
+        self._roots: List[Tuple[Walker, str]] = []
+        try:
+            for rule in rules:
+                for location in rule.locations:
+                    walker = rule.walker(location)
+                    for loc_path in location.path:
+                        top = os.path.abspath(render(loc_path))
+                        if os.path.isdir(top):
+                            self._roots.append((walker, top))
+                            self._watch_tree(walker, top, top)
+                        elif os.path.isdir(os.path.dirname(top)):
+                            # a single file location
+                            self._watch(os.path.dirname(top))
+                        else:
+                            logger.warning('Location "%s" does not exist.', top)
+        except Exception:
+            self.close()
+            raise
+
+    def _watch(self, path: str) -> bool:
+        if path in self._wds:
+            return True
+        try:
+            wd = self.inotify.add_watch(path)
+        except OSError as e:
+            if e.errno in (errno.ENOENT, errno.ENOTDIR, errno.EACCES):
+                return False
+            raise
+        self._wds[path] = wd
+        self._dirs[wd] = path
+        return True
+
+    def _unwatch_tree(self, path: str) -> None:
+        prefix = path + os.sep
+        for watched in [x for x in self._wds if x == path or x.startswith(prefix)]:
+            wd = self._wds.pop(watched)
+            self._dirs.pop(wd, None)
+            self.inotify.remove_watch(wd)
+
+    def _watch_tree(self, walker: Walker, top: str, path: str) -> Set[str]:
+        """
+        Watches `path` and the subfolders the walker descends into.
+
+        Returns all the pathes found below `path`.
+        """
+        found: Set[str] = set()
+        stack = [path]
+        while stack:
+            folder = stack.pop()
+            if not self._watch(folder):
+                continue
+            try:
+                with os.scandir(folder) as it:
+                    for entry in it:
+                        found.add(entry.path)
+                        if entry.is_dir(follow_symlinks=False) and walker.descends(
+                            top, entry.path
+                        ):
+                            stack.append(entry.path)
+            except OSError:
+                pass
+        return found
+
+    def _handle(self, event: Event, changes: Set[str]) -> None:
+        folder = self._dirs.get(event.wd)
+        if folder is None:
+            return
+        if event.mask & IN_IGNORED:
+            self._dirs.pop(event.wd, None)
+            if self._wds.get(folder) == event.wd:
+                del self._wds[folder]
+            return
+        if event.mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+            self._unwatch_tree(folder)
+            return
+        path = os.path.join(folder, event.name)
+        if event.mask & IN_ISDIR:
+            if event.mask & IN_MOVED_FROM:
+                # the watches would still report the old pathes
+                self._unwatch_tree(path)
+                return
+            if event.mask & (IN_CREATE | IN_MOVED_TO):
+                changes.add(path)
+                for walker, top in self._roots:
+                    if walker.descends(top, path):
+                        changes.update(self._watch_tree(walker, top, path))
+        elif event.mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+            changes.add(path)
+        else:
+            return
+        # the contents of the folder changed
+        changes.add(folder)
+
+    def changes(
+        self,
+        delay: float = 1.0,
+        stop: Optional[threading.Event] = None,
+    ) -> Iterator[Optional[List[Path]]]:
+        """
+        Yields the changed pathes, once there were no new events for `delay` seconds.
+
+        Yields `None` if the kernel dropped events, so all locations need to be
+        walked again.
+        """
+        changes: Set[str] = set()
+        overflow = False
+        idle_timeout = None if stop is None else STOP_POLL_INTERVAL
+        last_event = 0.0
+        while stop is None or not stop.is_set():
+            pending = bool(changes) or overflow
+            timeout: Optional[float]
+            if pending:
+                timeout = max(0.0, last_event + delay - time.monotonic())
+                if stop is not None:
+                    timeout = min(timeout, STOP_POLL_INTERVAL)
+            else:
+                timeout = idle_timeout
+            events = self.inotify.read_events(timeout=timeout)
+            for event in events:
+                if event.mask & IN_Q_OVERFLOW:
+                    overflow = True
+                else:
+                    self._handle(event, changes)
+            if events:
+                last_event = time.monotonic()
+            elif pending and time.monotonic() - last_event >= delay:
+                if overflow:
+                    # the directory structure may have changed as well
+                    for walker, top in self._roots:
+                        self._watch_tree(walker, top, top)
+                    yield None
+                else:
+                    yield sorted(Path(x) for x in changes)
+                changes.clear()
+                overflow = False
+
+    def close(self) -> None:
+        self.inotify.close()
+
+    def __enter__(self) -> "Watcher":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
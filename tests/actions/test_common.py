@@ -3,6 +3,7 @@ from pathlib import Path
 from conftest import make_files, read_files
 
 from organize.actions.common.target_path import prepare_target_path, user_wants_a_folder
+from organize.filesystem import use_filesystem
 
 
 def test_user_wants_a_folder():
@@ -88,5 +89,52 @@ def test_prepare_folder_no_folder(fs):
     assert read_files("some") == {"original": {"folder": {}}}
 
 
+def test_prepare_target_path_cached(tmp_path: Path, count_calls):
+    def prepare(name: str) -> Path:
+        return prepare_target_path(
+            src_name=name,
+            dst=f"{tmp_path}/out/txt/",
+            autodetect_folder=True,
+            simulate=False,
+        )
+
+    calls = count_calls(Path, "mkdir")
+    with use_filesystem(simulate=False):
+        assert prepare("a.txt") == (tmp_path / "out" / "txt" / "a.txt").resolve()
+        assert calls
+        calls.clear()
+        # the folder is known to exist now
+        assert prepare("b.txt") == (tmp_path / "out" / "txt" / "b.txt").resolve()
+        assert prepare("c.txt") == (tmp_path / "out" / "txt" / "c.txt").resolve()
+        assert not calls
+
+        # folders removed by other programs are created again
+        (tmp_path / "out" / "txt").rmdir()
+        assert prepare("d.txt") == (tmp_path / "out" / "txt" / "d.txt").resolve()
+        assert (tmp_path / "out" / "txt").is_dir()
+    assert read_files(tmp_path / "out") == {"txt": {}}
+
+
+def test_prepare_target_path_simulated_folders(fs):
+    with use_filesystem(simulate=True):
+        prepare_target_path(
+            src_name="a.txt",
+            dst="/out/archive/",
+            autodetect_folder=False,
+            simulate=True,
+        )
+        # the folder would exist now
+        assert (
+            prepare_target_path(
+                src_name="b.txt",
+                dst="/out/archive",
+                autodetect_folder=False,
+                simulate=True,
+            )
+            == Path("/out/archive/b.txt").resolve()
+        )
+    assert not Path("/out").exists()
+
+
 # TODO: Hier ist das Ordnerhandling noch unklar, also wenn eine Resource
 # ein Ordner ist.
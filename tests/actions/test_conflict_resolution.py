@@ -3,8 +3,10 @@ from pathlib import Path
 import pytest
 from conftest import make_files, read_files
 
+from organize import Config
 from organize.actions.common.conflict import next_free_name, resolve_conflict
-from organize.output import JSONL
+from organize.filesystem import created, moved, removed, use_filesystem
+from organize.output import JSONL, SavingOutput
 from organize.resource import Resource
 from organize.template import Template
 
@@ -42,6 +44,74 @@ def test_next_free_name_exception(fs):
         assert next_free_name(dst=Path("file.txt"), template=tmp)
 
 
+@pytest.mark.parametrize(
+    "template,wanted,result",
+    (
+        ("{name}-{counter}{extension}", "file.txt", "file-2.txt"),
+        (r"{name}-{'%02d' % counter}{extension}", "file.txt", "file-03.txt"),
+        ("{name}{counter}{extension}", "file.txt", "file4.txt"),
+        ("{name} {counter}{extension}", "folder/test.txt", "folder/test 2.txt"),
+    ),
+)
+def test_next_free_name_indexed(fs, template, wanted, result):
+    make_files(["file.txt", "file1.txt", "file-01.txt", "file-02.txt"], ".")
+    make_files(["file2.txt", "file3.txt"], ".")
+    fs.create_file("folder/test.txt")
+    tmp = Template.from_string(template)
+    with use_filesystem(simulate=False) as view:
+        assert next_free_name(dst=Path(wanted), template=tmp) == Path(result)
+        # files created outside the actions are found as well
+        fs.create_file(result)
+        second = next_free_name(dst=Path(wanted), template=tmp)
+        assert second != Path(result) and not second.exists()
+        # moving a file away makes its name free again
+        moved(Path(result), Path("elsewhere.txt"))
+        Path(result).unlink()
+        assert next_free_name(dst=Path(wanted), template=tmp) == Path(result)
+        assert view.occupied(Path(wanted))
+
+
+def test_next_free_name_counter_reset(fs):
+    make_files(["a.txt", "a 2.txt", "a 3.txt"], "test")
+    tmp = Template.from_string("{name} {counter}{extension}")
+    with use_filesystem(simulate=True) as view:
+        assert next_free_name(Path("/test/a.txt"), tmp) == Path("/test/a 4.txt")
+        created("/test/a 4.txt")
+        # only the names the template produced reset the counter
+        removed("/test/ba.txt")
+        assert view.counter("/test", tmp, "a", ".txt") == 4
+        removed("/test/a 2.txt")
+        assert view.counter("/test", tmp, "a", ".txt") == 2
+        assert next_free_name(Path("/test/a.txt"), tmp) == Path("/test/a 2.txt")
+
+
+@pytest.mark.parametrize("simulate", (True, False))
+def test_next_free_name_many_files(fs, simulate):
+    files = {f"src{i}": {"Screenshot.png": str(i)} for i in range(20)}
+    make_files(files, "test")
+    make_files(["Screenshot.png", "Screenshot 3.png"], "test/out")
+    config = """
+    rules:
+      - locations: /test
+        subfolders: true
+        filters:
+          - name: Screenshot
+        actions:
+          - move: /test/out/
+    """
+    output = SavingOutput()
+    Config.from_string(config).execute(simulate=simulate, output=output)
+    targets = [x for x in output.messages if x.startswith("Move to")]
+    assert len(set(targets)) == 20
+    expected = {f"Screenshot {i}.png" for i in (2, *range(4, 23))}
+    assert {Path(x[len("Move to ") :]).name for x in targets} == expected
+    if not simulate:
+        assert set(read_files("test/out")) == expected | {
+            "Screenshot.png",
+            "Screenshot 3.png",
+        }
+
+
 @pytest.mark.parametrize(
     "mode,result,files",
     (
@@ -101,3 +171,62 @@ def test_conflicting_folders(fs):
     )
     assert not result.skip_action
     assert result.use_dst == Path("/test/dir1/sub1 2")
+
+
+@pytest.mark.parametrize("simulate", (True, False))
+def test_simulated_changes(fs, simulate):
+    make_files(
+        {
+            "a": {"file.txt": "same", "other.txt": "a"},
+            "b": {"file.txt": "same", "other.txt": "b"},
+        },
+        "test",
+    )
+    config = """
+    rules:
+      - locations: /test/a
+        actions:
+          - move:
+              dest: /test/out/
+      - locations: /test/b
+        actions:
+          - move:
+              dest: /test/out/
+              on_conflict: deduplicate
+      - locations: ["/test/a", "/test/b"]
+        actions:
+          - echo: "left: {path.name}"
+    """
+    output = SavingOutput()
+    Config.from_string(config).execute(simulate=simulate, output=output)
+    # the simulation shows the same as the real run
+    assert output.messages == [
+        "Move to /test/out/file.txt",
+        "Move to /test/out/other.txt",
+        '"/test/out/file.txt" already exists! (Conflict mode is "deduplicate")',
+        "Duplicate skipped.",
+        '"/test/out/other.txt" already exists! (Conflict mode is "deduplicate")',
+        "Move to /test/out/other 2.txt",
+        "left: file.txt",
+    ]
+
+
+def test_simulated_overwrite(fs):
+    make_files({"file.txt": "new", "out": {"file.txt": "old"}}, "test")
+    with use_filesystem(simulate=True) as view:
+        output = JSONL()
+        result = resolve_conflict(
+            dst=Path("/test/out/file.txt"),
+            res=Resource(path=Path("/test/file.txt")),
+            conflict_mode="overwrite",
+            rename_template=Template.from_string("{name} {counter}{extension}"),
+            simulate=True,
+            output=output,
+        )
+        assert result == (False, Path("/test/out/file.txt"))
+        assert not view.exists("/test/out/file.txt")
+        moved("/test/file.txt", "/test/out/file.txt")
+        assert view.exists("/test/out/file.txt")
+        assert not view.exists("/test/file.txt")
+        assert view.real_path("/test/out/file.txt") == view.real_path("/test/file.txt")
+    assert read_files("test") == {"file.txt": "new", "out": {"file.txt": "old"}}
@@ -1,6 +1,6 @@
 from collections import Counter
 from pathlib import Path
-from typing import Dict, Iterable, List, Union
+from typing import Any, Callable, Dict, Iterable, List, Union
 
 import pytest
 
@@ -14,6 +14,30 @@ def testoutput() -> SavingOutput:
     return SavingOutput()
 
 
+@pytest.fixture()
+def count_calls(monkeypatch) -> Callable[[Any, str], List]:
+    """Wraps `owner.name` (or `owner[name]` for dicts) and returns the list of
+    first arguments it is called with.
+    """
+
+    def count(owner: Any, name: str) -> List:
+        calls: List = []
+        is_dict = isinstance(owner, dict)
+        original = owner[name] if is_dict else getattr(owner, name)
+
+        def counting(*args, **kwargs):
+            calls.append(args[0] if args else None)
+            return original(*args, **kwargs)
+
+        if is_dict:
+            monkeypatch.setitem(owner, name, counting)
+        else:
+            monkeypatch.setattr(owner, name, counting)
+        return calls
+
+    return count
+
+
 def equal_items(a: Iterable, b: Iterable) -> bool:
     return Counter(a) == Counter(b)
 
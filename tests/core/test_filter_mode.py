@@ -2,6 +2,7 @@ import pytest
 from conftest import make_files
 
 from organize import Config
+from organize.filters import filecontent
 
 
 @pytest.mark.parametrize(
@@ -50,3 +51,71 @@ def test_filter_mode_not(fs, testoutput, filter_mode, expected_msgs):
     """
     Config.from_string(config).execute(simulate=False, output=testoutput)
     assert testoutput.messages == expected_msgs
+
+
+def test_cost_order():
+    config = Config.from_string(
+        """
+        rules:
+          - locations: /test
+            filter_order: cost
+            filters:
+              - filecontent: foo
+              - not size: "> 1 MB"
+              - extension: txt
+              - python: "return True"
+              - hash
+              - name: foo
+            actions:
+              - echo: "Hello"
+        """
+    )
+    rule = config.rules[0]
+    names = [x.filter_config.name for x in rule.ordered_filters()]
+    # filters are not moved across the python filter
+    assert names == ["extension", "size", "filecontent", "python", "name", "hash"]
+
+    rule.filter_mode = "any"
+    assert rule.ordered_filters() == rule.filters
+
+
+def test_cost_order_templated_hash():
+    config = Config.from_string(
+        """
+        rules:
+          - locations: /test
+            filter_order: cost
+            filters:
+              - filecontent: "(?P<algo>md5|sha1)"
+              - hash: "{filecontent.algo}"
+              - extension: txt
+            actions:
+              - echo: "Hello"
+        """
+    )
+    names = [x.filter_config.name for x in config.rules[0].ordered_filters()]
+    # the templated hash filter depends on the filecontent filter
+    assert names == ["filecontent", "hash", "extension"]
+
+
+@pytest.mark.parametrize("filter_mode", ("all", "none"))
+def test_filter_order_cost(fs, testoutput, count_calls, filter_mode):
+    make_files({"foo.txt": "foo", "bar.pdf": "foo", "baz.txt": "bar"}, "test")
+    extracted = count_calls(filecontent, "textract")
+    config = f"""
+    rules:
+      - locations: /test
+        filter_mode: {filter_mode}
+        filter_order: cost
+        filters:
+          - filecontent: "(?P<word>foo)"
+          - {"not " if filter_mode == "none" else ""}extension: txt
+        actions:
+          - echo: "{{path.name}}"
+    """
+    Config.from_string(config).execute(simulate=False, output=testoutput)
+    if filter_mode == "all":
+        assert testoutput.messages == ["foo.txt"]
+    else:
+        assert testoutput.messages == ["baz.txt"]
+    assert sorted(path.name for path in extracted) == ["baz.txt", "foo.txt"]
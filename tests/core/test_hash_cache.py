@@ -0,0 +1,109 @@
+import os
+
+from organize.cache import HashCache, HashCacheSettings, use_hash_cache
+from organize.config import Config
+from organize.filters.hash import hash, hash_first_chunk
+
+
+def test_hash_cache_reuses_digest(tmp_path):
+    cache = HashCache(tmp_path / "cache.sqlite")
+    f = tmp_path / "file.txt"
+    f.write_text("Hello world")
+
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return "digest"
+
+    assert cache.digest(f, kind="full", algo="md5", compute=compute) == "digest"
+    assert cache.digest(f, kind="full", algo="md5", compute=compute) == "digest"
+    assert len(calls) == 1
+
+    # other kinds and algorithms are stored separately
+    cache.digest(f, kind="chunk1024", algo="md5", compute=compute)
+    cache.digest(f, kind="full", algo="sha1", compute=compute)
+    assert len(calls) == 3
+    assert len(cache) == 3
+    cache.close()
+
+
+def test_hash_cache_invalidation(tmp_path):
+    cache = HashCache(tmp_path / "cache.sqlite")
+    f = tmp_path / "file.txt"
+    f.write_text("Hello world")
+    cache.digest(f, kind="full", algo="md5", compute=lambda: "old")
+
+    # changed mtime
+    stat = f.stat()
+    os.utime(f, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+    assert cache.digest(f, kind="full", algo="md5", compute=lambda: "new") == "new"
+
+    # changed size
+    f.write_text("Hello world!")
+    assert cache.digest(f, kind="full", algo="md5", compute=lambda: "x") == "x"
+    assert len(cache) == 1
+    cache.close()
+
+
+def test_hash_cache_eviction(tmp_path):
+    cache = HashCache(tmp_path / "cache.sqlite", max_entries=2)
+    for i in range(4):
+        f = tmp_path / f"{i}.txt"
+        f.write_text(str(i))
+        cache.digest(f, kind="full", algo="md5", compute=lambda: "digest")
+    cache.evict()
+    assert len(cache) == 2
+    cache.close()
+
+
+def test_hash_cache_persists(tmp_path):
+    f = tmp_path / "hello.txt"
+    f.write_text("Hello world")
+    settings = HashCacheSettings(path=str(tmp_path / "cache.sqlite"))
+    with use_hash_cache(settings):
+        assert hash(f, algo="md5") == "3e25960a79dbc69b674cd4ec67a72c62"
+        assert hash_first_chunk(f, algo="md5") == "3e25960a79dbc69b674cd4ec67a72c62"
+    cache = HashCache(tmp_path / "cache.sqlite")
+    assert len(cache) == 2
+    cache.close()
+
+
+def test_hash_cache_config(tmp_path):
+    config = Config.from_string(
+        f"""
+        hash_cache:
+          path: {tmp_path / "cache.sqlite"}
+          max_entries: 10
+        rules:
+          - locations: {tmp_path}
+            filters:
+              - hash
+            actions:
+              - echo: "{{hash}}"
+        """
+    )
+    assert config.hash_cache == HashCacheSettings(
+        path=str(tmp_path / "cache.sqlite"),
+        max_entries=10,
+    )
+    assert Config.from_string("hash_cache: true\nrules: []").hash_cache is not None
+
+
+def test_hash_cache_shared(tmp_path, monkeypatch):
+    monkeypatch.setattr("organize.cache.BUSY_TIMEOUT", 0.05)
+    db = tmp_path / "cache.sqlite"
+    f = tmp_path / "file.txt"
+    f.write_text("Hello world")
+    first = HashCache(db)
+    second = HashCache(db)
+    first.digest(f, kind="full", algo="md5", compute=lambda: "first")
+
+    # a locked database is a cache miss, not an error
+    assert second.digest(f, kind="chunk", algo="md5", compute=lambda: "x") == "x"
+
+    # committed digests are visible to other processes
+    first.commit()
+    assert second.digest(f, kind="full", algo="md5", compute=lambda: "y") == "first"
+    second.close()
+    first.close()
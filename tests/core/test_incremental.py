@@ -0,0 +1,127 @@
+import itertools
+import os
+from pathlib import Path
+
+import pytest
+from conftest import make_files
+
+from organize import Config, cache
+from organize.output import SavingOutput
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_DIR", tmp_path / "cache")
+
+
+_timestamps = itertools.count(1_000_000_000)
+
+
+def make_old(*pathes: Path):
+    # Directory states are only recorded if the directory is not modified recently.
+    # Every call uses a different time, so the changes are detected.
+    timestamp = next(_timestamps)
+    for path in pathes:
+        os.utime(path, (timestamp, timestamp))
+
+
+def run(location: Path, simulate=False, action="echo: '{relative_path}'"):
+    output = SavingOutput()
+    Config.from_string(
+        f"""
+        rules:
+          - locations:
+              - path: "{location}"
+                incremental: true
+            subfolders: true
+            actions:
+              - {action}
+        """
+    ).execute(simulate=simulate, output=output)
+    return sorted(output.messages)
+
+
+def test_incremental(tmp_path: Path):
+    loc = tmp_path / "loc"
+    make_files({"top.txt": "", "a": {"1.txt": ""}, "b": {"2.txt": ""}}, loc)
+    make_old(loc, loc / "a", loc / "b")
+
+    assert run(loc) == ["a/1.txt", "b/2.txt", "top.txt"]
+    assert run(loc) == []
+
+    # changed directories are listed again
+    (loc / "b" / "3.txt").touch()
+    make_old(loc / "b")
+    assert run(loc) == ["b/2.txt", "b/3.txt"]
+    assert run(loc) == []
+
+    # new subdirectories are found
+    (loc / "a" / "c").mkdir()
+    (loc / "a" / "c" / "4.txt").touch()
+    make_old(loc / "a", loc / "a" / "c")
+    assert run(loc) == ["a/1.txt", "a/c/4.txt"]
+    assert run(loc) == []
+
+
+def test_incremental_recently_modified(tmp_path: Path):
+    loc = tmp_path / "loc"
+    make_files(["1.txt"], loc)
+    assert run(loc) == ["1.txt"]
+    assert run(loc) == ["1.txt"]
+
+
+def test_incremental_simulate(tmp_path: Path):
+    loc = tmp_path / "loc"
+    make_files(["1.txt"], loc)
+    make_old(loc)
+    assert run(loc, simulate=True) == ["1.txt"]
+    assert run(loc) == ["1.txt"]
+    assert run(loc, simulate=True) == []
+
+
+def test_incremental_errors(tmp_path: Path):
+    loc = tmp_path / "loc"
+    make_files(["1.txt"], loc)
+    make_old(loc)
+    assert run(loc, action="python: 'raise ValueError(\"failed\")'") == ["failed"]
+    assert run(loc) == ["1.txt"]
+
+
+def test_incremental_rule_changes(tmp_path: Path):
+    loc = tmp_path / "loc"
+    make_files(["1.txt"], loc)
+    make_old(loc)
+    assert run(loc) == ["1.txt"]
+    assert run(loc, action="echo: 'changed {relative_path}'") == ["changed 1.txt"]
+
+
+def test_incremental_filter_errors(tmp_path: Path):
+    loc = tmp_path / "loc"
+    make_files(["1.txt"], loc)
+    make_old(loc)
+    ready = tmp_path / "ready"
+    config = f"""
+    rules:
+      - locations:
+          - path: "{loc}"
+            incremental: true
+        filters:
+          - python: |
+              import os
+              if not os.path.exists(r"{ready}"):
+                  raise ValueError("not ready")
+              return True
+        actions:
+          - echo: "{{relative_path}}"
+    """
+
+    def run_filters():
+        output = SavingOutput()
+        Config.from_string(config).execute(simulate=False, output=output)
+        return output.messages
+
+    assert run_filters() == ["not ready"]
+    # files with filter errors are retried
+    ready.touch()
+    assert run_filters() == ["1.txt"]
+    assert run_filters() == []
@@ -0,0 +1,62 @@
+import pytest
+from conftest import make_files, read_files
+
+from organize import Config
+
+CONFIG = """
+rules:
+  - locations: /test
+    subfolders: true
+    filters:
+      - name
+      - regex: 'file-(?P<nr>\\d+)'
+      - filecontent: '(?P<content>.*)'
+    actions:
+      - echo: "{name} {regex.nr} {filecontent.content}"
+"""
+
+
+@pytest.mark.parametrize("jobs", (1, 2, 8))
+def test_jobs_keep_output_order(fs, testoutput, jobs):
+    files = {f"file-{i}.txt": f"content {i}" for i in range(30)}
+    files["sub"] = {"file-99.txt": "content 99", "other.txt": "other"}
+    make_files(files, "test")
+    Config.from_string(CONFIG).execute(simulate=False, output=testoutput, jobs=jobs)
+    expected = [f"file-{i} {i} content {i}" for i in range(30)]
+    expected.append("file-99 99 content 99")
+    assert testoutput.messages == expected
+
+
+def test_jobs_actions_are_serialized(fs):
+    make_files([f"{i}.txt" for i in range(20)], "test")
+    config = """
+    rules:
+      - locations: /test
+        filters:
+          - extension: txt
+        actions:
+          - move:
+              dest: /out/file.txt
+              on_conflict: rename_new
+    """
+    Config.from_string(config).execute(simulate=False, jobs=4)
+    result = read_files("out")
+    assert len(result) == 20
+    assert "file.txt" in result
+    assert "file 20.txt" in result
+
+
+def test_jobs_with_non_parallel_filter(fs, testoutput):
+    make_files({"a.txt": "same", "b.txt": "same", "c.txt": "other"}, "test")
+    config = """
+    rules:
+      - locations: /test
+        filters:
+          - duplicate
+        actions:
+          - echo: "{path.name} {duplicate.original.name}"
+    """
+    conf = Config.from_string(config)
+    assert not conf.rules[0].supports_parallel()
+    conf.execute(simulate=False, output=testoutput, jobs=4)
+    assert testoutput.messages == ["b.txt a.txt"]
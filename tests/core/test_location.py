@@ -104,3 +104,22 @@ def test_at_sign_in_path(fs):
 
     assert (Path(test_path) / "foo.txt").exists()
     assert (Path(test_path) / "bar.txt").exists()
+
+
+def test_scan_workers(fs, testoutput):
+    make_files(
+        {"a": {"1.txt": "", "b": {"2.txt": ""}}, "c": {"3.txt": ""}, "4.txt": ""},
+        "/test",
+    )
+    Config.from_string(
+        """
+        rules:
+          - locations:
+              - path: /test
+                scan_workers: 4
+            subfolders: true
+            actions:
+              - echo: '{relative_path}'
+        """
+    ).execute(simulate=False, output=testoutput)
+    assert testoutput.messages == ["4.txt", "a/1.txt", "a/b/2.txt", "c/3.txt"]
@@ -0,0 +1,84 @@
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from organize.filter import FilterConfig, Not
+from organize.output import SavingOutput
+from organize.resource import Resource
+from organize.rule import matching_resources_parallel, prefetch_pipeline
+from organize.walker import SkipPathes
+
+
+class Prefetcher:
+    filter_config = FilterConfig(name="prefetcher", files=True, dirs=True)
+
+    def __init__(self, prefetch_size: int):
+        self.prefetch_size = prefetch_size
+        self.windows: List[List[str]] = []
+
+    def prefetch(self, resources):
+        self.windows.append([res.path.name for res in resources])
+
+
+def resources(*names):
+    return [Resource(path=Path(name)) for name in names]
+
+
+def test_prefetch_windows():
+    prefetcher = Prefetcher(prefetch_size=2)
+    result = prefetch_pipeline(
+        filters=[prefetcher],
+        resources=resources("a", "b", "c", "d", "e"),
+    )
+    assert [res.path.name for res in result] == ["a", "b", "c", "d", "e"]
+    assert prefetcher.windows == [["a", "b"], ["c", "d"], ["e"]]
+
+
+def test_prefetch_windows_are_read_lazily():
+    prefetcher = Prefetcher(prefetch_size=2)
+    result = prefetch_pipeline(
+        filters=[Not(prefetcher)],  # type: ignore
+        resources=resources("a", "b", "c"),
+    )
+    assert next(result).path.name == "a"
+    assert prefetcher.windows == [["a", "b"]]
+
+
+def test_prefetch_disabled():
+    prefetcher = Prefetcher(prefetch_size=0)
+    result = list(prefetch_pipeline(filters=[prefetcher], resources=resources("a")))
+    assert len(result) == 1
+    assert prefetcher.windows == []
+
+
+class SlowPrefetcher(Prefetcher):
+    def __init__(self, prefetch_size: int):
+        super().__init__(prefetch_size)
+        self._prefetched: Dict[Path, str] = {}
+        self.misses: List[str] = []
+
+    def prefetch(self, resources):
+        super().prefetch(resources)
+        self._prefetched = {res.path: "data" for res in resources}
+
+    def pipeline(self, res, output):
+        time.sleep(0.005)
+        if self._prefetched.pop(res.path, None) is None:
+            self.misses.append(res.path.name)
+        return True
+
+
+def test_prefetch_parallel_keeps_pending_windows():
+    prefetcher = SlowPrefetcher(prefetch_size=3)
+    names = [str(i) for i in range(20)]
+    result = matching_resources_parallel(
+        filters=[prefetcher],  # type: ignore
+        filter_mode="all",
+        resources=resources(*names),
+        output=SavingOutput(),
+        skip_pathes=SkipPathes(),
+        jobs=4,
+    )
+    assert [res.path.name for res in result] == names
+    # the workers of a window finish before the next window is prefetched
+    assert prefetcher.misses == []
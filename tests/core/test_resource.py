@@ -0,0 +1,43 @@
+import os
+from pathlib import Path
+
+from organize.resource import Resource
+
+
+def test_resource_from_direntry(fs):
+    fs.create_file("test/file.txt", contents="Hello")
+    fs.create_dir("test/folder")
+
+    entries = {entry.name: entry for entry in os.scandir("test")}
+    file = Resource.from_direntry(entries["file.txt"], basedir=Path("test"))
+    folder = Resource.from_direntry(entries["folder"], basedir=Path("test"))
+
+    assert file.path == Path("test/file.txt")
+    assert file.is_file() and not file.is_dir()
+    assert folder.is_dir() and not folder.is_file()
+    assert file.stat().st_size == 5
+
+
+def test_resource_stat_is_cached(fs):
+    fs.create_file("test.txt", contents="Hello")
+    res = Resource(path=Path("test.txt"))
+    assert res.stat().st_size == 5
+
+    Path("test.txt").write_text("Hello World")
+    assert res.stat().st_size == 5
+
+
+def test_resource_cache_reset_on_path_change(fs):
+    fs.create_file("test/file.txt", contents="Hello")
+    fs.create_file("test/other.txt", contents="Hello World")
+
+    entry = next(e for e in os.scandir("test") if e.name == "file.txt")
+    res = Resource.from_direntry(entry)
+    assert res.stat().st_size == 5
+
+    res.path = Path("test/other.txt")
+    assert res.stat().st_size == 11
+
+    res.path = Path("test/missing")
+    assert not res.is_file()
+    assert not res.is_dir()
@@ -0,0 +1,76 @@
+from pathlib import Path
+
+import jinja2
+import pytest
+
+from organize.resource import Resource
+from organize.template import Template, compile_template, render, render_stats
+
+
+@pytest.mark.parametrize(
+    "source",
+    ("", "plain text", "~/Documents/", "trailing newline\n", "two newlines\n\n"),
+)
+def test_constant_templates(source):
+    jinja_text = jinja2.Environment().from_string(source).render()
+    template = Template.from_string(source)
+    assert template.constant_text == jinja_text
+    assert render(source) == render(template)
+
+
+def test_render_placeholders():
+    assert Template.from_string("{name}").constant_text is None
+    assert render("{name}-{counter}", dict(name="file", counter=2)) == "file-2"
+    assert render("{% for i in range(3) %}{i}{% endfor %}") == "012"
+    assert render("{env.HOME}") == render("~")
+    with pytest.raises(ValueError, match="Missing value for template"):
+        render("{missing}", dict(name="file"))
+
+
+def test_render_resource_lazily(count_calls):
+    calls = count_calls(Resource, "relative_path")
+    res = Resource(path=Path("/test/sub/file.txt"), basedir=Path("/test"))
+    res.vars["extension"] = "txt"
+
+    assert render("{path.name} {extension}", res.dict()) == "file.txt txt"
+    assert calls == []
+    assert render("{relative_path}", res.dict()) == str(Path("sub/file.txt"))
+    assert len(calls) == 1
+
+
+def test_resource_vars():
+    res = Resource(path=Path("/test/file.txt"), basedir=Path("/test"))
+    res.vars["size"] = 5
+    context = res.dict()
+    assert "relative_path" in context and "size" in context
+    assert "missing" not in context
+    assert dict(context) == dict(
+        path=Path("/test/file.txt"),
+        basedir=Path("/test"),
+        location=Path("/test"),
+        relative_path=Path("file.txt"),
+        rule=None,
+        rule_nr=0,
+        size=5,
+    )
+
+
+def test_compiled_template_cache():
+    before = render_stats()
+    source = "{name}.{counter} (cache test)"
+    assert render(source, dict(name="a", counter=1)) == "a.1 (cache test)"
+    assert render(source, dict(name="a", counter=2)) == "a.2 (cache test)"
+    assert compile_template(source) is compile_template(source)
+    render("no placeholders")
+
+    after = render_stats()
+    assert after["renders"] - before["renders"] == 3
+    assert after["constant"] - before["constant"] == 1
+    assert after["compile_misses"] - before["compile_misses"] == 1
+    assert after["compile_hits"] - before["compile_hits"] == 3
+
+
+def test_missing_resource_variable():
+    res = Resource(path=Path("/test/file.txt"), basedir=Path("/test"))
+    with pytest.raises(ValueError, match="'regex' is undefined. Maybe you forgot"):
+        render("{regex.nr}", res.dict())
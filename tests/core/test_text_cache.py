@@ -0,0 +1,96 @@
+import os
+
+from organize.cache import TextCache, TextCacheSettings, use_text_cache
+from organize.config import Config
+from organize.filters import filecontent
+
+
+def test_text_cache_in_memory(tmp_path):
+    cache = TextCache()
+    f = tmp_path / "file.txt"
+    f.write_text("Hello world")
+
+    calls = []
+
+    def extract():
+        calls.append(1)
+        return "text"
+
+    assert cache.text(f, kind=".txt", extract=extract) == "text"
+    assert cache.text(f, kind=".txt", extract=extract) == "text"
+    assert len(calls) == 1
+
+    # changed mtime
+    stat = f.stat()
+    os.utime(f, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+    assert cache.text(f, kind=".txt", extract=lambda: "new") == "new"
+    cache.close()
+
+
+def test_text_cache_persistent(tmp_path):
+    db = tmp_path / "texts.sqlite"
+    f = tmp_path / "file.txt"
+    f.write_text("Hello world")
+
+    cache = TextCache(db)
+    cache.text(f, kind=".txt", extract=lambda: "Hällo " * 1000)
+    cache.close()
+
+    cache = TextCache(db)
+    assert cache.text(f, kind=".txt", extract=lambda: "other") == "Hällo " * 1000
+    assert len(cache) == 1
+    cache.close()
+
+
+def test_text_cache_shared(tmp_path, monkeypatch):
+    monkeypatch.setattr("organize.cache.BUSY_TIMEOUT", 0.05)
+    db = tmp_path / "texts.sqlite"
+    f = tmp_path / "file.txt"
+    f.write_text("Hello world")
+    first = TextCache(db)
+    second = TextCache(db)
+    first.text(f, kind=".txt", extract=lambda: "first")
+
+    # a locked database does not fail the extraction
+    assert second.text(f, kind=".pdf", extract=lambda: "x") == "x"
+
+    # committed texts are visible to other processes
+    first.commit()
+    assert second.text(f, kind=".txt", extract=lambda: "y") == "first"
+    second.close()
+    first.close()
+
+
+def test_text_cache_eviction(tmp_path):
+    cache = TextCache(tmp_path / "texts.sqlite", max_size_mb=0.0002)
+    for i in range(3):
+        f = tmp_path / f"{i}.txt"
+        f.write_text(str(i))
+        cache.text(f, kind=".txt", extract=lambda: os.urandom(100).hex())
+    cache.evict()
+    # each compressed text is ~ 120 bytes, so only one fits into 200 bytes
+    assert len(cache) == 1
+    cache.close()
+
+
+def test_filecontent_uses_text_cache(tmp_path, count_calls):
+    f = tmp_path / "invoice.txt"
+    f.write_text("Invoice 1234, Customer ACME")
+    calls = count_calls(filecontent.EXTRACTORS, ".txt")
+    config = f"""
+    rules:
+      - locations: "{tmp_path}"
+        filters:
+          - filecontent: 'Invoice (?P<nr>\\d+)'
+          - filecontent: 'Customer (?P<customer>\\w+)'
+        actions:
+          - echo: "{{filecontent.nr}} {{filecontent.customer}}"
+    """
+    Config.from_string(config).execute(simulate=False)
+    assert len(calls) == 1
+
+    with use_text_cache(TextCacheSettings(path=str(tmp_path / "texts.sqlite"))):
+        filecontent.textract(f)
+    with use_text_cache(TextCacheSettings(path=str(tmp_path / "texts.sqlite"))):
+        filecontent.textract(f)
+    assert len(calls) == 2
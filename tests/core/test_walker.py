@@ -1,3 +1,5 @@
+import os
+import sys
 from collections import Counter
 from pathlib import Path
 
@@ -5,7 +7,14 @@ import pytest
 from conftest import equal_items, make_files
 from pyfakefs.fake_filesystem import FakeFilesystem
 
-from organize.walker import Walker
+from organize import walker as walker_module
+from organize.walker import (
+    PatternMatcher,
+    ScanCache,
+    SkipPathes,
+    Walker,
+    pattern_match,
+)
 
 
 def counter(items):
@@ -172,3 +181,253 @@ def test_order(fs):
         Path("/test/2024/003"),
         Path("/test/2024/004"),
     ]
+
+
+@pytest.mark.parametrize("workers", (0, 3))
+def test_walk_order(fs, workers):
+    make_files(
+        {
+            "b.txt": "",
+            "a.txt": "",
+            "dir10": {"x": "", "sub": {"y": ""}},
+            "dir9": {"z": ""},
+        },
+        "test",
+    )
+
+    def walk(method):
+        walker = Walker(method=method, workers=workers)
+        return [x.path for x in walker.walk("/test")]
+
+    assert walk("breadth") == [
+        "/test/a.txt",
+        "/test/b.txt",
+        "/test/dir9",
+        "/test/dir10",
+        "/test/dir9/z",
+        "/test/dir10/x",
+        "/test/dir10/sub",
+        "/test/dir10/sub/y",
+    ]
+    assert walk("depth") == [
+        "/test/dir9/z",
+        "/test/dir10/sub/y",
+        "/test/dir10/x",
+        "/test/dir10/sub",
+        "/test/a.txt",
+        "/test/b.txt",
+        "/test/dir9",
+        "/test/dir10",
+    ]
+
+
+@pytest.mark.parametrize("method", ("depth", "breadth"))
+def test_walk_deep_tree(tmp_path: Path, method):
+    # deeper than the recursion limit
+    dirs = [tmp_path / "d"]
+    for _ in range(sys.getrecursionlimit() + 100):
+        dirs.append(dirs[-1] / "d")
+    for path in dirs:
+        path.mkdir()
+    file = dirs[-1] / "file.txt"
+    file.touch()
+    try:
+        assert list(Walker(method=method).files(str(tmp_path))) == [file]
+    finally:
+        # shutil.rmtree (used by pytest to clean up tmp_path) recurses
+        file.unlink()
+        for path in reversed(dirs):
+            path.rmdir()
+
+
+def test_sort(fs):
+    make_files(["file10.txt", "file2.txt", "File1.txt"], "test")
+
+    def names(**kwargs):
+        return [x.name for x in Walker(**kwargs).files("/test")]
+
+    assert names() == ["File1.txt", "file2.txt", "file10.txt"]
+    assert names(sort="plain") == ["File1.txt", "file10.txt", "file2.txt"]
+    assert sorted(names(sort="none")) == sorted(names())
+
+
+@pytest.mark.parametrize("method", ("depth", "breadth"))
+def test_stream(fs, method):
+    make_files(
+        {
+            "a.txt": "",
+            "b.txt": "",
+            "sub": {"c.txt": "", "deeper": {"d.txt": ""}},
+            "excluded.tmp": "",
+        },
+        "test",
+    )
+    walker = Walker(method=method, stream=True, exclude_files={"*.tmp"})
+    result = [x.path for x in walker.walk("/test")]
+    expected = [
+        x.path for x in Walker(method=method, exclude_files={"*.tmp"}).walk("/test")
+    ]
+    assert sorted(result) == sorted(expected)
+    if method == "breadth":
+        # the files of a folder are still handled before its subfolders
+        assert set(result[:2]) == {"/test/a.txt", "/test/b.txt"}
+        assert result[-1] == "/test/sub/deeper/d.txt"
+
+
+def test_stream_yields_while_reading(fs, monkeypatch):
+    make_files(["a.txt", "b.txt"], "test")
+    listed = []
+    iter_scandir = walker_module.iter_scandir
+
+    def tracking_iter_scandir(top):
+        for entry, is_dir in iter_scandir(top):
+            listed.append(entry.name)
+            yield entry, is_dir
+
+    monkeypatch.setattr(walker_module, "iter_scandir", tracking_iter_scandir)
+    it = Walker(stream=True).walk("/test")
+    next(it)
+    assert len(listed) == 1
+
+
+@pytest.mark.parametrize(
+    "walker",
+    (
+        Walker(),
+        Walker(min_depth=1, max_depth=2),
+        Walker(max_depth=0),
+        Walker(exclude_dirs={"d2"}, filter_files=["*.txt"]),
+        Walker(filter_dirs=["d1"], exclude_files={"f2*"}),
+    ),
+)
+def test_yields_and_descends(fs, walker: Walker):
+    make_files(
+        {
+            "f1.txt": "",
+            "f2.pdf": "",
+            "d1": {"f1.txt": "", "d1": {"f2.txt": "", "d2": {"f1.txt": ""}}},
+            "d2": {"f1.pdf": "", "d1": {}},
+        },
+        "/test",
+    )
+    walked = {x.path for x in walker.walk("/test", files=True, dirs=True)}
+    listed = {"/test"} | {os.path.dirname(x) for x in walked}
+    for root, dirs, files in os.walk("/test"):
+        for name in dirs + files:
+            path = os.path.join(root, name)
+            is_dir = name in dirs
+            assert walker.yields("/test", path, is_dir=is_dir) == (path in walked)
+            if is_dir and walker.yields("/test", path, is_dir=True):
+                # empty folders are not listed in the walk results
+                assert walker.descends("/test", path) == (
+                    walker.max_depth is None
+                    or path.count(os.sep) - 2 < walker.max_depth
+                )
+    assert walker.descends("/test", "/test")
+    assert not walker.yields("/test", "/test", is_dir=True)
+    assert not walker.yields("/test", "/other/f1.txt", is_dir=False)
+    assert all(walker.descends("/test", x) for x in listed)
+
+
+@pytest.mark.parametrize(
+    "patterns",
+    (
+        [],
+        ["thumbs.db", ".DS_Store", "~$*"],
+        ["*.py", "test_?.txt", "[abc]*", "[!x]y"],
+        ["literal.txt", "*.TXT"],
+    ),
+)
+def test_pattern_matcher(patterns):
+    names = [
+        "thumbs.db",
+        ".DS_Store",
+        "~$document.docx",
+        "main.py",
+        "test_1.txt",
+        "test_12.txt",
+        "apple",
+        "zy",
+        "xy",
+        "literal.txt",
+        "LITERAL.TXT",
+        "other\nname.py",
+    ]
+    matcher = PatternMatcher(patterns)
+    for name in names:
+        assert matcher(name) == pattern_match(name, patterns), name
+
+
+def test_skip_pathes():
+    skip = SkipPathes([Path("/test/a.txt")])
+    skip.add("./test/b.txt")
+    assert "/test/a.txt" in skip
+    assert Path("test/b.txt") in skip
+    assert Path("/test/c.txt") not in skip
+    assert None not in skip
+    assert len(skip) == 2
+
+
+@pytest.mark.parametrize("method", ("depth", "breadth"))
+def test_skip_pathes_prune_subtrees(fs, method):
+    make_files(
+        {
+            "a.txt": "",
+            "skipped": {"file.txt": "", "sub": {"file.txt": ""}},
+            "other": {"file.txt": "", "skipped.txt": ""},
+        },
+        "test",
+    )
+    skip = SkipPathes(["/test/skipped", "/test/other/skipped.txt"])
+    assert equal_items(
+        Walker(method=method).files("/test", skip=skip),
+        [Path("/test/a.txt"), Path("/test/other/file.txt")],
+    )
+    assert equal_items(
+        Walker(method=method).dirs("/test", skip=skip),
+        [Path("/test/other")],
+    )
+
+
+def test_skip_pathes_change_while_walking(fs):
+    make_files({"a": {"file.txt": ""}, "b": {"file.txt": ""}}, "test")
+    skip = SkipPathes()
+    result = []
+    for path in Walker().files("/test", skip=skip):
+        result.append(path)
+        skip.add("/test/b")
+    assert result == [Path("/test/a/file.txt")]
+
+
+def _make_old(path: Path, offset: int = 0):
+    # directory listings are only cached if the directory is not modified recently
+    os.utime(path, (1_000_000_000 + offset, 1_000_000_000 + offset))
+
+
+def test_scan_cache(tmp_path: Path):
+    make_files(["a.txt", "b.txt"], tmp_path)
+    _make_old(tmp_path)
+    cache = ScanCache()
+    walker = Walker()
+    assert [x.name for x in walker.files(str(tmp_path), scan_cache=cache)] == [
+        "a.txt",
+        "b.txt",
+    ]
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert len(list(walker.files(str(tmp_path), scan_cache=cache))) == 2
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # changes are detected by the directory mtime
+    (tmp_path / "c.txt").touch()
+    _make_old(tmp_path, offset=1)
+    assert len(list(walker.files(str(tmp_path), scan_cache=cache))) == 3
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_scan_cache_recently_modified(tmp_path: Path):
+    make_files(["a.txt"], tmp_path)
+    cache = ScanCache()
+    walker = Walker()
+    list(walker.files(str(tmp_path), scan_cache=cache))
+    list(walker.files(str(tmp_path), scan_cache=cache))
+    assert (cache.hits, cache.misses) == (0, 2)
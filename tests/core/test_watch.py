@@ -0,0 +1,108 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from conftest import make_files
+
+from organize import Config
+from organize.output import SavingOutput
+
+linux_only = pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="inotify is Linux only"
+)
+
+
+def test_changed_resources(tmp_path: Path):
+    loc = tmp_path / "loc"
+    make_files(
+        {"top.txt": "", "top.pdf": "", "sub": {"1.txt": ""}, "excl": {"2.txt": ""}},
+        loc,
+    )
+    config = Config.from_string(
+        f"""
+        rules:
+          - locations:
+              - path: "{loc}"
+                filter: ["*.txt"]
+                exclude_dirs: ["excl"]
+            subfolders: true
+            actions:
+              - echo: "{{relative_path}}"
+        """
+    )
+    rule = config.rules[0]
+    changes = [
+        loc / "top.txt",
+        loc / "top.pdf",
+        loc / "sub",
+        loc / "sub" / "1.txt",
+        loc / "excl" / "2.txt",
+        loc / "missing.txt",
+        tmp_path / "outside.txt",
+    ]
+    result = [res.relative_path() for res in rule.changed_resources(changes)]
+    assert result == [Path("top.txt"), Path("sub/1.txt")]
+
+    output = SavingOutput()
+    rule.execute(simulate=False, output=output, changes=changes)
+    assert output.messages == ["top.txt", "sub/1.txt"]
+
+
+def wait_for(condition, timeout=5.0):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@linux_only
+def test_watch(tmp_path: Path):
+    inbox = tmp_path / "inbox"
+    make_files({"existing.txt": "", "sub": {}}, inbox)
+    config = Config.from_string(
+        f"""
+        rules:
+          - locations: "{inbox}"
+            subfolders: true
+            filters:
+              - extension: txt
+            actions:
+              - rename: "{{path.stem}}-done.txt"
+        """
+    )
+    output = SavingOutput()
+    stop = threading.Event()
+    thread = threading.Thread(
+        target=config.watch,
+        kwargs=dict(simulate=False, output=output, delay=0.05, stop=stop),
+    )
+    thread.start()
+    try:
+        time.sleep(0.2)
+        (inbox / "new.txt").write_text("Hello")
+        (inbox / "new.pdf").write_text("Hello")
+        (inbox / "sub" / "other.txt").write_text("Hello")
+        assert wait_for(lambda: (inbox / "sub" / "other-done.txt").exists())
+        assert wait_for(lambda: (inbox / "new-done.txt").exists())
+
+        # new folders are watched, too
+        (inbox / "newdir").mkdir()
+        (inbox / "newdir" / "file.txt").write_text("Hello")
+        assert wait_for(lambda: (inbox / "newdir" / "file-done.txt").exists())
+
+        # renamed files are not handled again
+        time.sleep(0.3)
+    finally:
+        stop.set()
+        thread.join()
+    assert sorted(x.name for x in inbox.rglob("*") if x.is_file()) == [
+        "existing.txt",
+        "file-done.txt",
+        "new-done.txt",
+        "new.pdf",
+        "other-done.txt",
+    ]
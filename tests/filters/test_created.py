@@ -1,9 +1,13 @@
+import subprocess
+import sys
+import time
 from datetime import datetime, timedelta
 
+import pytest
 from arrow import now as arrow_now
 
-from organize.filters import Created
-from organize.filters.created import read_created
+from organize.filters import Created, created
+from organize.filters.created import read_created, read_statx_created
 
 
 def test_min():
@@ -24,3 +28,35 @@ def test_read_created(tmp_path):
     f = tmp_path / "file.txt"
     f.touch()
     assert read_created(f).date() == datetime.utcnow().date()
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Linux only")
+def test_read_statx_created(tmp_path):
+    f = tmp_path / "file.txt"
+    f.touch()
+    timestamp = read_statx_created(f)
+    if timestamp is None:
+        pytest.skip("statx birth time not supported")
+    assert abs(timestamp - time.time()) < 60
+    with pytest.raises(OSError):
+        read_statx_created(tmp_path / "missing")
+
+
+def test_read_stat_created_remembers_command(tmp_path, monkeypatch):
+    calls = []
+
+    def check_output(cmd, **kwargs):
+        calls.append(cmd[:-1])
+        if cmd[:-1] == created.STAT_COMMANDS[0]:
+            raise subprocess.CalledProcessError(1, cmd)
+        return "1234\n"
+
+    monkeypatch.setattr(created, "_stat_commands", list(created.STAT_COMMANDS))
+    monkeypatch.setattr(created.subprocess, "check_output", check_output)
+    assert created.read_stat_created(tmp_path) == 1234
+    assert created.read_stat_created(tmp_path) == 1234
+    assert calls == [
+        created.STAT_COMMANDS[0],
+        created.STAT_COMMANDS[1],
+        created.STAT_COMMANDS[1],
+    ]
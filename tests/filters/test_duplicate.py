@@ -1,6 +1,11 @@
+import os
+from pathlib import Path
+
 from conftest import make_files, read_files
 
 from organize import Config
+from organize.cache import DuplicateIndex
+from organize.filters.hash import hash, hash_first_chunk
 
 CONTENT_SMALL = "COPY CONTENT"
 CONTENT_LARGE = "XYZ" * 300000
@@ -71,3 +76,129 @@ def test_duplicate_largefiles(fs):
 # TODO detect_original_by: first_seen
 # TODO detect_original_by: created
 # TODO detect_original_by: lastmodified
+
+
+def test_duplicate_index(tmp_path, testoutput):
+    index = tmp_path / "index.sqlite"
+    make_files(
+        {"a.txt": CONTENT_SMALL, "b.txt": CONTENT_LARGE, "unique.txt": "unique"},
+        tmp_path / "archive",
+    )
+    make_files(
+        {"copy.txt": CONTENT_SMALL, "new.txt": "new", "other.txt": "wen"},
+        tmp_path / "downloads",
+    )
+
+    def run(location):
+        config = f"""
+        rules:
+          - locations: "{location}"
+            filters:
+              - duplicate:
+                  index: "{index}"
+            actions:
+              - echo: "{{duplicate.original.name}}"
+        """
+        Config.from_string(config).execute(simulate=False, output=testoutput)
+        return testoutput.messages
+
+    # build the index from the archive
+    assert run(tmp_path / "archive") == []
+
+    # check the downloads against the archive
+    assert run(tmp_path / "downloads") == ["a.txt"]
+
+    # vanished files are pruned from the index
+    (tmp_path / "archive" / "a.txt").unlink()
+    assert run(tmp_path / "downloads") == []
+
+
+def test_duplicate_index_is_original(tmp_path, testoutput):
+    index = tmp_path / "index.sqlite"
+    make_files({"a.txt": CONTENT_SMALL}, tmp_path / "archive")
+    make_files({"b.txt": CONTENT_SMALL, "c.txt": CONTENT_SMALL}, tmp_path / "new")
+    # the archive file is older, but it must never become the duplicate
+    os.utime(tmp_path / "archive" / "a.txt", (0, 0))
+
+    def run(location, update_index):
+        config = f"""
+        rules:
+          - locations: "{location}"
+            filters:
+              - duplicate:
+                  index: "{index}"
+                  update_index: {update_index}
+                  detect_original_by: "-lastmodified"
+            actions:
+              - echo: "{{duplicate.original.name}}"
+              - delete
+        """
+        Config.from_string(config).execute(simulate=False, output=testoutput)
+        return [x for x in testoutput.messages if not x.startswith("Deleting")]
+
+    assert run(tmp_path / "archive", update_index=True) == []
+    assert run(tmp_path / "new", update_index=False) == ["a.txt", "a.txt"]
+    assert read_files(tmp_path / "archive") == {"a.txt": CONTENT_SMALL}
+    assert read_files(tmp_path / "new") == {}
+
+
+def test_duplicate_hash_workers(fs):
+    files = {
+        f"{i:02}.txt": (CONTENT_LARGE[: -len(str(i % 4))] + str(i % 4))
+        for i in range(20)
+    }
+    make_files(files, "test")
+    config = """
+    rules:
+      - locations: "test"
+        filters:
+          - duplicate:
+              detect_original_by: name
+              hash_workers: 4
+        actions:
+          - delete
+    """
+    Config.from_string(config).execute(simulate=False)
+    assert read_files("test") == {
+        "00.txt": files["00.txt"],
+        "01.txt": files["01.txt"],
+        "02.txt": files["02.txt"],
+        "03.txt": files["03.txt"],
+    }
+
+
+def test_duplicate_index_find(tmp_path, count_calls):
+    make_files({"a.txt": CONTENT_SMALL, "b.txt": CONTENT_SMALL}, tmp_path)
+    a, b = tmp_path / "a.txt", tmp_path / "b.txt"
+    index = DuplicateIndex(tmp_path / "index.sqlite", algo="md5")
+    stat = a.stat()
+    index.add(
+        a,
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+        chunk_hash=hash_first_chunk(a, algo="md5"),
+        full_hash=hash(a, algo="md5"),
+    )
+    # a second process can use the index once it is committed
+    index.commit()
+    other = DuplicateIndex(tmp_path / "index.sqlite", algo="md5")
+
+    def find():
+        return other.find(
+            b,
+            size=stat.st_size,
+            chunk_hash=lambda p: hash_first_chunk(p, algo="md5"),
+            full_hash=lambda p: hash(p, algo="md5"),
+        )
+
+    stats = count_calls(Path, "stat")
+    assert find() == a
+    # the known file is only checked on disk for the match
+    assert stats == [a]
+
+    # changed files are pruned
+    a.write_text("changed")
+    assert find() is None
+    assert len(other) == 0
+    other.close()
+    index.close()
@@ -1,3 +1,4 @@
+import sys
 from pathlib import Path
 
 import pytest
@@ -5,7 +6,12 @@ from conftest import ORGANIZE_DIR
 from pyfakefs.fake_filesystem import FakeFilesystem
 
 from organize import Config
-from organize.filters.exif import matches_tags
+from organize.filters.exif import (
+    ExifTool,
+    exiftool_read,
+    exiftool_read_many,
+    matches_tags,
+)
 
 
 @pytest.fixture
@@ -124,3 +130,80 @@ def test_exif_filter_by_multiple_keys(images_folder):
     Config.from_string(config).execute(simulate=False)
     chosen = set(str(x.name) for x in Path("/chosen").glob("*"))
     assert chosen == set(["3.jpg", "4.jpg"])
+
+
+FAKE_EXIFTOOL = r"""#!PYTHON
+import json
+import sys
+
+args = []
+for line in sys.stdin:
+    arg = line.rstrip("\n")
+    if arg == "-execute":
+        paths = [x for x in args if not x.startswith("-")]
+        if any("crash" in path for path in paths):
+            sys.exit(1)
+        result = [
+            {"SourceFile": path, "File": {}, "ExifTool": {}, "EXIF": {"Make": path}}
+            for path in paths
+            if "missing" not in path
+        ]
+        print(json.dumps(result))
+        print("{ready}", flush=True)
+        args = []
+    elif args == ["-stay_open"] and arg == "False":
+        sys.exit(0)
+    else:
+        args.append(arg)
+"""
+
+
+@pytest.fixture
+def fake_exiftool(tmp_path: Path) -> str:
+    exe = tmp_path / "exiftool"
+    exe.write_text(FAKE_EXIFTOOL.replace("PYTHON", sys.executable))
+    exe.chmod(0o755)
+    return str(exe)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs a shebang script")
+def test_exiftool_worker(fake_exiftool):
+    exiftool = ExifTool(executable=fake_exiftool)
+    try:
+        assert exiftool_read(Path("/a.jpg"), exiftool=exiftool) == {
+            "SourceFile": "/a.jpg",
+            "File": {},
+            "ExifTool": {},
+            "EXIF": {"Make": "/a.jpg"},
+        }
+        process = exiftool._process
+        assert exiftool_read(Path("/b.jpg"), exiftool=exiftool)["EXIF"] == {
+            "Make": "/b.jpg"
+        }
+        # the same process is reused
+        assert exiftool._process is process
+
+        # the worker is restarted after a crash
+        assert exiftool_read(Path("/crash.jpg"), exiftool=exiftool) == {}
+        assert exiftool_read(Path("/c.jpg"), exiftool=exiftool)["EXIF"] == {
+            "Make": "/c.jpg"
+        }
+    finally:
+        exiftool.close()
+    assert not exiftool.is_running()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs a shebang script")
+def test_exiftool_read_many(fake_exiftool):
+    exiftool = ExifTool(executable=fake_exiftool)
+    try:
+        paths = [Path("/a.jpg"), Path("/missing.jpg"), Path("/b.jpg")]
+        result = exiftool_read_many(paths, exiftool=exiftool)
+        assert result[Path("/a.jpg")]["EXIF"] == {"Make": "/a.jpg"}
+        assert Path("/missing.jpg") not in result
+        assert result[Path("/b.jpg")]["EXIF"] == {"Make": "/b.jpg"}
+        # a failed batch returns nothing, so the files are read one by one
+        paths = [Path("/crash.jpg"), Path("/c.jpg")]
+        assert exiftool_read_many(paths, exiftool=exiftool) == {}
+    finally:
+        exiftool.close()
@@ -1,6 +1,12 @@
+import re
+from pathlib import Path
+
+import pytest
 from conftest import make_files, read_files
 
 from organize import Config
+from organize.filters import filecontent
+from organize.filters.filecontent import iter_text_windows, search_text
 
 
 def test_filecontent(fs):
@@ -31,3 +37,118 @@ def test_filecontent(fs):
         "MegaCorp_Invoice_12345.txt": "Lorem MegaCorp Ltd. ipsum\nInvoice 12345\nMore text\nID: 98765",
         "Test2.txt": "Tests",
     }
+
+
+def test_iter_text_windows(tmp_path):
+    f = tmp_path / "test.log"
+    f.write_text("".join(f"line {i}\n" for i in range(1000)))
+    windows = list(iter_text_windows(f, chunk_size=100, overlap=20))
+    assert len(windows) > 10
+    for window in windows:
+        # windows contain only complete lines
+        assert window.startswith("line ")
+        assert window.endswith("\n")
+    assert "".join(windows).count("line 999\n") >= 1
+
+
+def test_iter_text_windows_max_bytes(tmp_path):
+    f = tmp_path / "test.txt"
+    f.write_text("äöü" * 100, encoding="utf-8")
+    assert "".join(iter_text_windows(f, max_bytes=5, chunk_size=2)) == "äö"
+    assert list(iter_text_windows(tmp_path / "test.txt", max_bytes=0)) == [""]
+
+
+@pytest.mark.parametrize("stream", (True, False))
+def test_search_text(tmp_path, stream):
+    f = tmp_path / "test.log"
+    lines = [f"{i:06d} INFO nothing to see\n" for i in range(100_000)]
+    lines[50_000] = "050000 ERROR code=1234\n"
+    f.write_text("".join(lines))
+
+    expr = re.compile(r"^\d+ ERROR code=(?P<code>\d+)$", re.MULTILINE | re.DOTALL)
+    match = search_text(f, expr, stream=stream)
+    assert match is not None
+    assert match.groupdict() == {"code": "1234"}
+    assert search_text(f, expr, stream=stream, max_bytes=1000) is None
+
+
+@pytest.mark.parametrize(
+    "stream,max_bytes", ((True, None), (False, 1000), (True, 1000))
+)
+def test_search_text_crlf(tmp_path, stream, max_bytes):
+    f = tmp_path / "test.log"
+    f.write_bytes(b"INFO start\r\nERROR disk full\r\nINFO end\r\n")
+    expr = re.compile(r"^ERROR (?P<message>[^\n]*)$", re.MULTILINE | re.DOTALL)
+    match = search_text(f, expr, stream=stream, max_bytes=max_bytes)
+    assert match is not None
+    assert match.groupdict() == {"message": "disk full"}
+
+
+def test_filecontent_stream(fs):
+    make_files(
+        {
+            "app.log": "INFO start\n" * 1000 + "ERROR user=alice\n" + "INFO\n" * 100,
+            "other.log": "INFO start\n" * 1000,
+        },
+        "test",
+    )
+    Config.from_string(
+        r"""
+        rules:
+        - locations: "/test"
+          filters:
+            - filecontent:
+                expr: '^ERROR user=(?P<user>\w+)$'
+                stream: true
+          actions:
+            - rename: "{filecontent.user}.log"
+        """
+    ).execute(simulate=False)
+    assert set(read_files("test")) == {"alice.log", "other.log"}
+
+
+def test_pdftotext_max_pages(monkeypatch):
+    calls = []
+
+    def check_output(cmd, **kwargs):
+        calls.append(cmd)
+        return "text"
+
+    monkeypatch.setattr(filecontent.subprocess, "check_output", check_output)
+    monkeypatch.setattr(filecontent, "_pdftotext_available", lambda: True)
+    filecontent.extract_pdf(Path("test.pdf"), max_pages=2)
+    filecontent.extract_pdf(Path("test.pdf"), keep_layout=False)
+    assert calls == [
+        ("pdftotext", "-layout", "-l", "2", "test.pdf", "-"),
+        ("pdftotext", "test.pdf", "-"),
+    ]
+
+
+def test_filecontent_workers(fs, monkeypatch, count_calls):
+    # the test files are plain text
+    monkeypatch.setitem(filecontent.EXTRACTORS, ".pdf", filecontent.extract_txt)
+    extracted = count_calls(filecontent.EXTRACTORS, ".pdf")
+    files = {f"{i}.pdf": f"Invoice {i}" for i in range(10)}
+    files["broken.pdf"] = "Nothing"
+    files["notes.txt"] = "Invoice 99"
+    make_files(files, "test")
+    Config.from_string(
+        r"""
+        rules:
+        - locations: "/test"
+          filters:
+            - filecontent:
+                expr: 'Invoice (?P<nr>\d+)'
+                workers: 4
+          actions:
+            - rename: "invoice-{filecontent.nr}{path.suffix}"
+        """
+    ).execute(simulate=False)
+    assert sorted(path.name for path in extracted) == sorted(
+        x for x in files if x.endswith(".pdf")
+    )
+    assert set(read_files("test")) == {
+        *(f"invoice-{i}.pdf" for i in range(10)),
+        "invoice-99.txt",
+        "broken.pdf",
+    }
@@ -1,6 +1,8 @@
+import pytest
 from conftest import make_files, read_files
 
-from organize import Config
+from organize import Config, ConfigError
+from organize.filters import Python
 
 
 def test_python(fs, testoutput):
@@ -191,3 +193,34 @@ def test_folder_instructions(fs):
             },
         },
     }
+
+
+def test_python_syntax_error():
+    config = """
+        rules:
+          - locations: /test
+            filters:
+              - python: |
+                  return name +
+            actions:
+              - echo: "{python}"
+        """
+    with pytest.raises(ConfigError):
+        Config.from_string(config)
+
+
+def test_python_compiles_once(fs, testoutput):
+    make_files(["a.txt", "b.txt", "c.txt"], "test")
+    python = Python("return path.name")
+    config = Config.from_string(
+        """
+        rules:
+          - locations: /test
+            actions:
+              - echo: "{python}"
+        """
+    )
+    config.rules[0].filters.append(python)
+    config.execute(simulate=False, output=testoutput)
+    assert testoutput.messages == ["a.txt", "b.txt", "c.txt"]
+    assert len(python._usercode._funcs) == 1